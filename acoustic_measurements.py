@@ -1,14 +1,39 @@
 import os
-import sys
 import csv
+import argparse
 import parselmouth
 import numpy as np
 from textgrid import TextGrid
-from extract_sonority import extract_sonority
+from utils_acoustic import tier_frame_indices
 
 def compute_durations(tier):
     return [(interval.mark, "{:.2f}".format(interval.maxTime - interval.minTime)) for interval in tier]
 
+def load_sound(input_wav, sound=None):
+    """Return ``sound`` if a loaded Sound is given, otherwise load ``input_wav``."""
+    return parselmouth.Sound(input_wav) if sound is None else sound
+
+def compute_pitch_track(input_wav, time_step=0.01, pitch_floor=75, pitch_ceiling=500, sound=None):
+    """Return the Praat pitch track used for the average pitch.
+
+    Pitch is calculated using Praat's autocorrelation method to mirror the
+    behaviour of the Praat GUI.
+    """
+    sound = load_sound(input_wav, sound)
+    return sound.to_pitch_ac(
+        time_step=time_step,
+        pitch_floor=pitch_floor,
+        pitch_ceiling=pitch_ceiling,
+    )
+
+def compute_voicing_track(input_wav, sound=None):
+    """Return the pitch track shared by the pitch trend and VOT.
+
+    These measurements use Praat's default pitch analysis (600 Hz ceiling),
+    not the settings of :func:`compute_pitch_track`.
+    """
+    return load_sound(input_wav, sound).to_pitch()
+
 def compute_pitch(
     input_wav,
     tier,
@@ -16,33 +41,27 @@ def compute_pitch(
     pitch_floor=75,
     pitch_ceiling=500,
     voiced_ratio_threshold=0.5,
+    pitch=None,
 ):
     """Return average pitch for each interval in ``tier``.
 
     Pitch is calculated using Praat's autocorrelation method to mirror the
-    behaviour of the Praat GUI.  Intervals are considered unvoiced when fewer
+    behaviour of the Praat GUI, unless a precomputed ``pitch`` track is given.
+    Intervals are considered unvoiced when fewer
     than ``voiced_ratio_threshold`` of the analysed frames contain a non-zero
     pitch value.  This guards against spurious pitch detections in voiceless
     segments (e.g. voiceless consonants).
     """
 
-    sound = parselmouth.Sound(input_wav)
-    pitch = sound.to_pitch_ac(
-        time_step=time_step,
-        pitch_floor=pitch_floor,
-        pitch_ceiling=pitch_ceiling,
-    )
+    if pitch is None:
+        pitch = compute_pitch_track(input_wav, time_step, pitch_floor, pitch_ceiling)
 
     pitch_values = pitch.selected_array["frequency"]
-    times = pitch.xs()
+    start_indices, end_indices = tier_frame_indices(pitch, tier)
     phone_pitches = []
 
-    for interval in tier:
-        start_time = interval.minTime
-        end_time = interval.maxTime
-
-        indices = np.logical_and(times >= start_time, times <= end_time)
-        interval_values = pitch_values[indices]
+    for start_index, end_index in zip(start_indices, end_indices):
+        interval_values = pitch_values[start_index:end_index]
 
         if len(interval_values) == 0:
             phone_pitches.append(0.0)
@@ -60,25 +79,39 @@ def compute_pitch(
 
     return phone_pitches
 
-def compute_pitch_trend(input_wav, tier):
-    sound = parselmouth.Sound(input_wav)
-    pitch = sound.to_pitch()
+def compute_pitch_trend(input_wav, tier, pitch=None):
+    """Classify the pitch contour of each interval as rising, falling or mixed.
+
+    Monotonicity is checked for the whole tier at once from the signs of
+    ``np.diff`` over the pitch track, counted per interval with cumulative sums.
+    """
+    if pitch is None:
+        pitch = compute_voicing_track(input_wav)
     pitch_values = pitch.selected_array['frequency']
+    start_indices, end_indices = tier_frame_indices(pitch, tier)
+
+    diffs = np.diff(pitch_values)
+    rising_cs = np.concatenate(([0], np.cumsum(diffs > 0)))
+    falling_cs = np.concatenate(([0], np.cumsum(diffs < 0)))
+    # An interval of n frames has n - 1 consecutive pairs, stored at diff indices [start, end - 1)
+    pair_starts = np.minimum(start_indices, len(diffs))
+    pair_ends = np.minimum(np.maximum(end_indices - 1, start_indices), len(diffs))
+    num_pairs = pair_ends - pair_starts
+    rising = rising_cs[pair_ends] - rising_cs[pair_starts] == num_pairs
+    falling = falling_cs[pair_ends] - falling_cs[pair_starts] == num_pairs
+
     trends = []
-    for interval in tier:
-        start_index = int(interval.minTime // pitch.time_step)
-        end_index = int(interval.maxTime // pitch.time_step)
-        pitch_segment = pitch_values[start_index:end_index]
-        if all(x < y for x, y in zip(pitch_segment, pitch_segment[1:])):
+    for is_rising, is_falling, length in zip(rising, falling, end_indices - start_indices):
+        if is_rising:
             trends.append('rising')
-        elif all(x > y for x, y in zip(pitch_segment, pitch_segment[1:])):
+        elif is_falling:
             trends.append('falling')
         else:
-            trends.append('mixed' if len(pitch_segment) > 1 else 'unknown')
+            trends.append('mixed' if length > 1 else 'unknown')
     return trends
 
-def compute_formants(input_wav, tier):
-    sound = parselmouth.Sound(input_wav)
+def compute_formants(input_wav, tier, sound=None):
+    sound = load_sound(input_wav, sound)
     formant = sound.to_formant_burg()
     formant_values = {'F1': [], 'F2': [], 'F3': [], 'F4': []}
     for interval in tier:
@@ -95,8 +128,8 @@ def compute_formants(input_wav, tier):
         formant_values['F4'].append(round(f4_value, 1) if f4_value is not None else 0.0)
     return formant_values
 
-def compute_intensity(input_wav, tier, intensity_threshold=50):
-    sound = parselmouth.Sound(input_wav)
+def compute_intensity(input_wav, tier, intensity_threshold=50, sound=None):
+    sound = load_sound(input_wav, sound)
     intensity = sound.to_intensity()
     phone_intensities = []
     for interval in tier:
@@ -106,35 +139,30 @@ def compute_intensity(input_wav, tier, intensity_threshold=50):
         phone_intensities.append(round(avg_phone_intensity, 1))
     return phone_intensities
 
-def compute_vot(input_wav, tier):
-    sound = parselmouth.Sound(input_wav)
-    intensity = sound.to_intensity()
-    intensity_values = intensity.values[0]  # Assuming one channel
-    pitch = sound.to_pitch()
+def compute_vot(input_wav, tier, pitch=None, cutoff_frequency=100):
+    """Return the voice onset time of each interval in ``tier``.
+
+    VOT is measured from the first pitch frame above ``cutoff_frequency``
+    (the onset of voicing) to the end of the interval, and is 0.0 when no
+    such frame exists.  The first crossing is located for all intervals at
+    once with a cumulative count of voiced frames.
+    """
+    if pitch is None:
+        pitch = compute_voicing_track(input_wav)
     pitch_values = pitch.selected_array['frequency']
-    vot_values = []
-    for interval in tier:
-        start_time = interval.minTime
-        end_time = interval.maxTime
-        start_index = int(start_time // intensity.time_step)
-        end_index = int(end_time // intensity.time_step)
-        start_index_pitch = int(start_time // pitch.time_step)
-        end_index_pitch = int(end_time // pitch.time_step)
-        pitch_interval = pitch_values[start_index_pitch:end_index_pitch]
-        # VOT is measured from the end of the phone to the onset of voicing
-        cutoff_frequency = 100  # Adjust as needed based on your data
-        # Find the first pitch value above the cutoff frequency (indicating voicing onset)
-        for i, pitch_value in enumerate(pitch_interval):
-            if pitch_value > cutoff_frequency:
-                vot = end_time - ((start_index_pitch + i) * pitch.time_step)
-                break
-        else:
-            vot = 0.0  # If voicing onset not found, set VOT to 0.0
-        vot_values.append(round(vot, 3))
-    return vot_values
+    start_indices, end_indices = tier_frame_indices(pitch, tier)
+    end_times = np.array([interval.maxTime for interval in tier], dtype=float)
 
-def compute_cog(input_wav, tier, power=2):
-    snd = parselmouth.Sound(input_wav)
+    voiced_cs = np.concatenate(([0], np.cumsum(pitch_values > cutoff_frequency)))
+    has_onset = voiced_cs[end_indices] > voiced_cs[start_indices]
+    # Index of the first frame at or after the interval start whose cumulative count increases
+    onset_indices = np.searchsorted(voiced_cs, voiced_cs[start_indices] + 1, side='left') - 1
+    onset_times = pitch.x1 + onset_indices * pitch.dx
+    vot = np.where(has_onset, end_times - onset_times, 0.0)
+    return [round(float(v), 3) for v in vot]
+
+def compute_cog(input_wav, tier, power=2, sound=None):
+    snd = load_sound(input_wav, sound)
     cog_values = []
     for interval in tier:
         # Extract the audio within the given time interval
@@ -147,6 +175,9 @@ def compute_cog(input_wav, tier, power=2):
 
 def compute_sonority(input_wav, tier):
     """Return average sonority for each interval in ``tier``."""
+    # Imported here so that runs without sonority do not load torchaudio
+    from extract_sonority import extract_sonority
+
     sonority_vals, sonority_times = extract_sonority(input_wav, plot_graphs=False)
     sonority_values = []
     for interval in tier:
@@ -176,62 +207,143 @@ def save_to_csv(header, data, output_csv):
         writer.writerow(header)
         writer.writerows(zip(*data))
 
-def main(input_textgrid, input_wav, output_csv, level="phones"):
+# Shared analyses that several features depend on, computed at most once per run.
+# An analysis may use those listed before it in a feature's 'requires'.
+ANALYSES = {
+    'sound': lambda ctx: parselmouth.Sound(ctx['input_wav']),
+    'pitch_track': lambda ctx: compute_pitch_track(ctx['input_wav'], sound=ctx['sound']),
+    'voicing_track': lambda ctx: compute_voicing_track(ctx['input_wav'], sound=ctx['sound']),
+}
+
+# Measurement registry: feature name -> analyses it needs, levels it applies to
+# (None for all levels) and a function returning its (column, values) pairs.
+# The order of the entries defines the column order of the CSV file.
+FEATURES = {
+    'duration': {
+        'requires': [],
+        'levels': None,
+        'compute': lambda ctx: [('Duration', [d[1] for d in compute_durations(ctx['tier'])])],
+    },
+    'pitch': {
+        'requires': ['sound', 'pitch_track'],
+        'levels': None,
+        'compute': lambda ctx: [('AvgPitch', compute_pitch(ctx['input_wav'], ctx['tier'], pitch=ctx['pitch_track']))],
+    },
+    'pitch_trend': {
+        'requires': ['sound', 'voicing_track'],
+        'levels': None,
+        'compute': lambda ctx: [('PitchTrend', compute_pitch_trend(ctx['input_wav'], ctx['tier'], pitch=ctx['voicing_track']))],
+    },
+    'formants': {
+        'requires': ['sound'],
+        'levels': ['phones'],
+        'compute': lambda ctx: [(f'{name}Formant', values) for name, values in compute_formants(ctx['input_wav'], ctx['tier'], sound=ctx['sound']).items()],
+    },
+    'intensity': {
+        'requires': ['sound'],
+        'levels': None,
+        'compute': lambda ctx: [('Intensity', compute_intensity(ctx['input_wav'], ctx['tier'], sound=ctx['sound']))],
+    },
+    'sonority': {
+        'requires': [],
+        'levels': None,
+        'compute': lambda ctx: [('Sonority', compute_sonority(ctx['input_wav'], ctx['tier']))],
+    },
+    'vot': {
+        'requires': ['sound', 'voicing_track'],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('VOT', compute_vot(ctx['input_wav'], ctx['tier'], pitch=ctx['voicing_track']))],
+    },
+    'cog': {
+        'requires': ['sound'],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('COG', compute_cog(ctx['input_wav'], ctx['tier'], sound=ctx['sound']))],
+    },
+    'context': {
+        'requires': [],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('PreviousPhone', [''] + [interval.mark for interval in ctx['tier'][:-1]]),
+                                ('NextPhone', [interval.mark for interval in ctx['tier'][1:]] + [''])],
+    },
+    'word': {
+        'requires': [],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('Word', get_item(ctx['tier'], ctx['tg'].getFirst("strd-wrd-sgmnt")))],
+    },
+    'sentence': {
+        'requires': [],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('Sentence', get_item(ctx['tier'], ctx['tg'].getFirst("standardized-trs")))],
+    },
+    'audio_id': {
+        'requires': [],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('AudioID', [os.path.splitext(os.path.basename(ctx['input_textgrid']))[0].replace("-avd", '')] * len(ctx['tier']))],
+    },
+    'speaker_id': {
+        'requires': [],
+        'levels': ['phones'],
+        'compute': lambda ctx: [('SpeakerID', get_item(ctx['tier'], ctx['tg'].getFirst("speaker-ID")))],
+    },
+}
+
+LEVEL_LABELS = {"phones": "Phone", "cnvrstl-syllables": "Syllable"}
+
+def resolve_features(features, level):
+    """Return the requested features that apply to ``level`` (in registry order) and the analyses they need."""
+    explicit = features is not None and 'all' not in features
+    if not explicit:
+        features = list(FEATURES)
+    unknown = [name for name in features if name not in FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}. Available: {', '.join(FEATURES)}")
+
+    selected = []
+    for name in FEATURES:
+        if name not in features:
+            continue
+        levels = FEATURES[name]['levels']
+        if levels is not None and level not in levels:
+            if explicit:
+                print(f"Skipping feature '{name}', which is not available at level '{level}'")
+            continue
+        selected.append(name)
+
+    analyses = []
+    for name in selected:
+        for analysis in FEATURES[name]['requires']:
+            if analysis not in analyses:
+                analyses.append(analysis)
+    return selected, analyses
+
+def main(input_textgrid, input_wav, output_csv, level="phones", features=None):
     tg = TextGrid.fromFile(input_textgrid)
     tier = tg.getFirst(level)
-    duration = compute_durations(tier)
-    pitch = compute_pitch(input_wav, tier)
-    pitch_trend = compute_pitch_trend(input_wav, tier)
-    intensity = compute_intensity(input_wav, tier)
-    sonority = compute_sonority(input_wav, tier)
-
-    if level == "phones":
-        formants = compute_formants(input_wav, tier)
-        vot = compute_vot(input_wav, tier)
-        cog = compute_cog(input_wav, tier)
-        previous_phone = [''] + [interval.mark for interval in tier[:-1]]
-        next_phone = [interval.mark for interval in tier[1:]] + ['']
-        word = get_item(tier, tg.getFirst("strd-wrd-sgmnt"))
-        sentence = get_item(tier, tg.getFirst("standardized-trs"))
-        speakerID = get_item(tier, tg.getFirst("speaker-ID"))
-        audioID = [os.path.splitext(os.path.basename(input_textgrid))[0].replace("-avd",'')] * len(duration)
-        csv_data = [('Phone', [t[0] for t in duration]),
-            ('Duration', [t[1] for t in duration]),
-            ('AvgPitch', pitch),
-            ('PitchTrend', pitch_trend),
-            ('F1Formant', formants['F1']),
-            ('F2Formant', formants['F2']),
-            ('F3Formant', formants['F3']),
-            ('F4Formant', formants['F4']),
-            ('Intensity', intensity),
-            ('Sonority', sonority),
-            ('VOT', vot),
-            ('COG', cog),
-            ('PreviousPhone', previous_phone),
-            ('NextPhone', next_phone),
-            ('Word', word),
-            ('Sentence', sentence),
-            ('AudioID', audioID),
-            ('SpeakerID', speakerID),
-        ]
-
-    elif level == "cnvrstl-syllables":
-        csv_data = [
-            ('Syllable', [d[0] for d in duration]),
-            ('Duration', [d[1] for d in duration]),
-            ('AvgPitch', pitch),
-            ('PitchTrend', pitch_trend),
-            ('Intensity', intensity),
-            ('Sonority', sonority),
-        ]
+    selected, analyses = resolve_features(features, level)
+
+    ctx = {'input_textgrid': input_textgrid, 'input_wav': input_wav, 'tg': tg, 'tier': tier}
+    for analysis in analyses:
+        ctx[analysis] = ANALYSES[analysis](ctx)
+
+    csv_data = [(LEVEL_LABELS[level], [interval.mark for interval in tier])]
+    for name in selected:
+        csv_data.extend(FEATURES[name]['compute'](ctx))
 
     save_to_csv( [t[0] for t in csv_data],  [t[1] for t in csv_data], output_csv)
     print(f"Acoustic measurements saved to {output_csv}")
 
 if __name__ == "__main__":
-    if len(sys.argv) == 4:
-        main(sys.argv[1], sys.argv[2], sys.argv[3])
-    elif len(sys.argv) == 5:
-        main(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4])
-    else:
-        print("Usage: python acoustic_measurements.py [input.TextGrid] [input.wav] [output.csv] [level (optional, default='phones')]")
+    parser = argparse.ArgumentParser(description="Compute acoustic measurements for the intervals of a TextGrid tier.")
+    parser.add_argument("input_textgrid", help="Input TextGrid file")
+    parser.add_argument("input_wav", help="Input WAV file")
+    parser.add_argument("output_csv", help="Output CSV file")
+    parser.add_argument("level", nargs="?", default="phones", choices=list(LEVEL_LABELS), help="Tier to measure (default: phones)")
+    parser.add_argument("--features", default="all",
+                        help=f"Comma-separated list of features to compute (default: all). Available: {', '.join(FEATURES)}")
+    args = parser.parse_args()
+    features = [f.strip() for f in args.features.split(',') if f.strip()]
+    unknown = [name for name in features if name != 'all' and name not in FEATURES]
+    if unknown:
+        parser.error(f"unknown features: {', '.join(unknown)} (available: all, {', '.join(FEATURES)})")
+
+    main(args.input_textgrid, args.input_wav, args.output_csv, args.level, features)
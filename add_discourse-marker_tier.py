@@ -1,4 +1,6 @@
+import os
 import sys
+from functools import lru_cache
 from textgrid import TextGrid, IntervalTier, Interval
 import string
 
@@ -14,53 +16,63 @@ def load_discourse_markers(file_path):
     markers.sort(key=lambda x: len(x), reverse=True)
     return markers
 
-def detect_discourse_markers(word_intervals, single_markers, multi_markers):
-    discourse_marker_tier = []
-    index = 0
-    while index < len(word_intervals):
-        start, _, label = word_intervals[index]
-        normalized_label = label.strip().lower()
+def compile_discourse_markers(markers):
+    """
+    Compile discourse markers into a token-level trie.
 
-        # Initialize variables for checking multi-word discourse markers
-        matched_marker = None
-        matched_end = None
+    Each node maps a word to its child node; the None key marks the end of a
+    marker and stores its length in words.
+    """
+    trie = {}
+    for marker in markers:
+        marker_words = marker.split()
+        if not marker_words:
+            continue
+        node = trie
+        for marker_word in marker_words:
+            node = node.setdefault(marker_word, {})
+        node[None] = len(marker_words)
+    return trie
 
-        # Check for multi-word discourse markers first
-        for marker in multi_markers:
-            marker_words = marker.split()
-            match_count = 0
+@lru_cache(maxsize=None)
+def _load_marker_trie(file_path, mtime):
+    return compile_discourse_markers(load_discourse_markers(file_path))
 
-            # Check if the following words match the multi-word discourse marker
-            for offset, marker_word in enumerate(marker_words):
-                if (index + offset) < len(word_intervals) and marker_word == word_intervals[index + offset][2].strip().lower():
-                    match_count += 1
-                else:
-                    break
+def load_discourse_marker_trie(file_path):
+    """Load and compile the marker file, reusing the compiled trie while the file is unchanged."""
+    return _load_marker_trie(os.path.abspath(file_path), os.path.getmtime(file_path))
 
-            # If all words of the marker are found consecutively
-            if match_count == len(marker_words):
-                matched_marker = marker
-                matched_end = word_intervals[index + match_count - 1][1]  # End time of the last word
+def detect_discourse_markers(word_intervals, marker_trie):
+    """Label the longest discourse marker starting at each word in a single left-to-right scan."""
+    discourse_marker_tier = []
+    labels = [label.strip().lower() for _, _, label in word_intervals]
+    index = 0
+    while index < len(word_intervals):
+        # Walk the trie as far as the following words allow and keep the longest complete marker
+        node = marker_trie
+        match_length = 0
+        offset = index
+        while offset < len(labels):
+            node = node.get(labels[offset])
+            if node is None:
                 break
+            offset += 1
+            if None in node:
+                match_length = node[None]
 
-        # If a multi-word marker is matched, append it
-        if matched_marker:
-            discourse_marker_tier.append((start, matched_end, 'POS'))
-            index += len(matched_marker.split())  # Skip the matched words
+        if match_length:
+            start = word_intervals[index][0]
+            end = word_intervals[index + match_length - 1][1]  # End time of the last word
+            discourse_marker_tier.append((start, end, 'POS'))
+            index += match_length  # Skip the matched words
         else:
-            # Check for single-word discourse markers if no multi-word marker is found
-            if normalized_label in single_markers:
-                end = word_intervals[index][1]  # End time of the current word
-                discourse_marker_tier.append((start, end, 'POS'))
             index += 1  # Move to the next interval
 
     return discourse_marker_tier
 
 def main(input_textgrid, output_textgrid, marker_file):
     # Load discourse markers from the file
-    all_markers = load_discourse_markers(marker_file)
-    single_markers = {m for m in all_markers if ' ' not in m}
-    multi_markers = {m for m in all_markers if ' ' in m}
+    marker_trie = load_discourse_marker_trie(marker_file)
 
     # Load and parse the TextGrid file
     tg = TextGrid.fromFile(input_textgrid)
@@ -69,7 +81,7 @@ def main(input_textgrid, output_textgrid, marker_file):
     strd_wrd_sgmnt = [(interval.minTime, interval.maxTime, interval.mark) for interval in strd_wrd_sgmnt]
     # Remove all punctuation
     strd_wrd_sgmnt = [(t[0], t[1], t[2].translate(str.maketrans('', '', string.punctuation))) for t in strd_wrd_sgmnt]
-    dm_intervals = detect_discourse_markers(strd_wrd_sgmnt, single_markers, multi_markers)
+    dm_intervals = detect_discourse_markers(strd_wrd_sgmnt, marker_trie)
 
     # Add new tier
     new_tier = IntervalTier(name="discourse-marker", minTime=tg.minTime, maxTime=tg.maxTime)
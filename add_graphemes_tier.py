@@ -3,6 +3,7 @@ import os
 from textgrid import TextGrid, IntervalTier, Interval
 from collections import defaultdict
 import re
+from utils import assign_intervals_to_words
 
 def initialize_phoneme_grapheme_map():
     """Initialize a mapping between phonemes and potential graphemes in Slovene"""
@@ -79,6 +80,9 @@ def initialize_phoneme_grapheme_map():
     }
     return pg_map
 
+# Built once and shared by all calls to align_phonemes_to_graphemes
+PHONEME_GRAPHEME_MAP = initialize_phoneme_grapheme_map()
+
 def get_pronunciation_dict(dict_path):
     """Load a pronunciation dictionary from file"""
     pron_dict = {}
@@ -109,7 +113,7 @@ def align_phonemes_to_graphemes(word, phonemes):
         return [""] * len(phonemes)
     
     word = word.lower()
-    pg_map = initialize_phoneme_grapheme_map()
+    pg_map = PHONEME_GRAPHEME_MAP
     result = [""] * len(phonemes)
     
     # Special case handling for single-character words
@@ -306,19 +310,19 @@ def add_phoneme_grapheme_mapping_tier(input_textgrid, output_textgrid, dict_path
     # Dictionary to track failed mappings for analysis
     failed_mappings = []
     
+    # Assign phonemes to words in a single sweep over both tiers
+    word_intervals = [interval for interval in word_tier if interval.mark.strip()]
+    phone_intervals = list(phone_tier)
+    phone_indices = assign_intervals_to_words(
+        [(interval.minTime, interval.maxTime) for interval in word_intervals],
+        [(interval.minTime, interval.maxTime) for interval in phone_intervals])
+    
     # Process each word
-    for word_interval in word_tier:
+    for word_interval, indices in zip(word_intervals, phone_indices):
         word = word_interval.mark.strip()
-        if not word:  # Skip empty intervals
-            continue
         
-        # Find all phonemes in this word's time range
-        word_phonemes = []
-        for phone_interval in phone_tier:
-            # Check if the phone is within or overlaps with the word
-            if (phone_interval.minTime >= word_interval.minTime and 
-                phone_interval.maxTime <= word_interval.maxTime):
-                word_phonemes.append(phone_interval)
+        # Phonemes within this word's time range
+        word_phonemes = [phone_intervals[i] for i in indices]
         
         # Skip if no phonemes found for this word
         if not word_phonemes:
@@ -2,6 +2,7 @@ import sys
 import parselmouth
 import numpy as np
 from textgrid import TextGrid, IntervalTier, Interval
+from utils_acoustic import track_frame_indices
 
 def detect_intensity_resets(audio_path, input_textgrid, output_textgrid, intensity_reset_threshold=7, method="near", silence_threshold=50):
     # Load the audio and the TextGrid
@@ -17,6 +18,9 @@ def detect_intensity_resets(audio_path, input_textgrid, output_textgrid, intensi
     syllable_intervals = [(interval.minTime, interval.maxTime, interval.mark) for interval in syllable_intervals]
     # Remove empty intervals
     syllable_intervals = [t for t in syllable_intervals if t[-1] != '']
+
+    # Map all syllables to intensity frames at once
+    start_indices, end_indices = track_frame_indices(intensity, [t[0] for t in syllable_intervals], [t[1] for t in syllable_intervals])
     
     # Create a new tier for intensity resets
     intensity_reset_intervals = []
@@ -27,9 +31,7 @@ def detect_intensity_resets(audio_path, input_textgrid, output_textgrid, intensi
         start_time, end_time, _ = syllable_intervals[i]
         
         # Extract intensity values for the current syllable
-        start_index = int(start_time // intensity.time_step)
-        end_index = int(end_time // intensity.time_step)
-        syllable_intensity_values = intensity_values[start_index:end_index]
+        syllable_intensity_values = intensity_values[start_indices[i]:end_indices[i]]
         syllable_intensity_values = syllable_intensity_values[syllable_intensity_values > silence_threshold]  # Include only values greater than silence_threshold, i.e. exclude non-speach parts
         syllable_mean_intensity = syllable_intensity_values.mean() if len(syllable_intensity_values) > 0 else 0
 
@@ -38,8 +40,7 @@ def detect_intensity_resets(audio_path, input_textgrid, output_textgrid, intensi
             neighbors_mean_intensity = []
             for j in range(max(0, i-1), min(i+2, num_intervals)):
                 if j != i:
-                    neighbor_start_time, neighbor_end_time, _ = syllable_intervals[j]
-                    neighbor_intensity_values = intensity_values[int(neighbor_start_time // intensity.time_step):int(neighbor_end_time // intensity.time_step)]
+                    neighbor_intensity_values = intensity_values[start_indices[j]:end_indices[j]]
                     neighbor_intensity_values = neighbor_intensity_values[neighbor_intensity_values > silence_threshold]  # Include only valus greater than silence_threshold dB
                     neighbors_mean_intensity.append(neighbor_intensity_values.mean() if len(neighbor_intensity_values) > 0 else 0)
 
@@ -50,8 +51,7 @@ def detect_intensity_resets(audio_path, input_textgrid, output_textgrid, intensi
             neighbors_mean_intensity = []
             for j in range(max(0, i-2), min(i+3, num_intervals)):
                 if j != i:
-                    neighbor_start_time, neighbor_end_time, _ = syllable_intervals[j]
-                    neighbor_intensity_values = intensity_values[int(neighbor_start_time // intensity.time_step):int(neighbor_end_time // intensity.time_step)]
+                    neighbor_intensity_values = intensity_values[start_indices[j]:end_indices[j]]
                     neighbor_intensity_values = neighbor_intensity_values[neighbor_intensity_values > silence_threshold]  # Include only valus greater than silence_threshold dB
                     neighbors_mean_intensity.append(neighbor_intensity_values.mean() if len(neighbor_intensity_values) > 0 else 0)
 
@@ -1,7 +1,7 @@
 import sys
 import parselmouth
-import numpy as np
 from textgrid import TextGrid, IntervalTier, Interval
+from utils_acoustic import syllable_pitch_statistics, track_frame_indices
 
 def detect_pitch_resets(audio_path, input_textgrid, output_textgrid, pitch_reset_threshold, method="average-neighboring"):
     # Load the audio and the TextGrid
@@ -18,6 +18,10 @@ def detect_pitch_resets(audio_path, input_textgrid, output_textgrid, pitch_reset
     # Remove empty intervals
     syllable_intervals = [t for t in syllable_intervals if t[-1] != '']
 
+    # Compute pitch statistics once per syllable; both methods read from this table
+    start_indices, end_indices = track_frame_indices(pitch, [t[0] for t in syllable_intervals], [t[1] for t in syllable_intervals])
+    pitch_stats = syllable_pitch_statistics(pitch_values, start_indices, end_indices)
+
     # Create a new tier for pitch resets
     pitch_reset_intervals = []
     num_intervals = len(syllable_intervals)
@@ -25,28 +29,13 @@ def detect_pitch_resets(audio_path, input_textgrid, output_textgrid, pitch_reset
     for i in range(num_intervals):
         # Get the start and end time of the syllable
         start_time, end_time, _ = syllable_intervals[i]
-        
-        # Extract pitch values for the current syllable
-        start_index = int(start_time // pitch.time_step)
-        end_index = int(end_time // pitch.time_step)
-        syllable_pitch_values = pitch_values[start_index:end_index]
-        syllable_pitch_values = syllable_pitch_values[syllable_pitch_values != 0]  # Remove zero values
 
         if method == "average-neighboring":
-            syllable_mean_pitch = syllable_pitch_values.mean() if len(syllable_pitch_values) > 0 else 0
+            syllable_mean_pitch = pitch_stats["mean"][i]
             
             # Calculate mean pitch of previous and next syllables
             if i > 0 and i < num_intervals - 1:
-                prev_start_time, prev_end_time, _ = syllable_intervals[i-1]
-                next_start_time, next_end_time, _ = syllable_intervals[i+1]
-
-                prev_syllable_pitch_values = pitch_values[int(prev_start_time // pitch.time_step):int(prev_end_time // pitch.time_step)]
-                next_syllable_pitch_values = pitch_values[int(next_start_time // pitch.time_step):int(next_end_time // pitch.time_step)]
-
-                prev_syllable_mean = prev_syllable_pitch_values[prev_syllable_pitch_values != 0].mean() if any(prev_syllable_pitch_values != 0) else 0
-                next_syllable_mean = next_syllable_pitch_values[next_syllable_pitch_values != 0].mean() if any(next_syllable_pitch_values != 0) else 0
-                
-                reference_mean_pitch = (prev_syllable_mean + next_syllable_mean) / 2
+                reference_mean_pitch = (pitch_stats["mean"][i-1] + pitch_stats["mean"][i+1]) / 2
             else:
                 reference_mean_pitch = syllable_mean_pitch
 
@@ -54,11 +43,8 @@ def detect_pitch_resets(audio_path, input_textgrid, output_textgrid, pitch_reset
             pitch_reset_occurs = abs(syllable_mean_pitch - reference_mean_pitch) >= pitch_reset_threshold
 
         elif method == "intrasyllabic":
-            if len(syllable_pitch_values) > 1:
-                max_pitch = max(syllable_pitch_values)
-                min_pitch = min(syllable_pitch_values)
-                semitone_difference = 12 * np.log2(max_pitch / min_pitch)
-                pitch_reset_occurs = semitone_difference >= 4
+            if pitch_stats["voiced_count"][i] > 1:
+                pitch_reset_occurs = pitch_stats["semitone_range"][i] >= 4
             else:
                 pitch_reset_occurs = False
 
@@ -1,27 +1,88 @@
 import sys
 from textgrid import TextGrid, IntervalTier, Interval
 
-def get_speaker(start_time, end_time, speaker_intervals):
-    max_overlap = 0
-    max_overlap_speaker = None
-    
-    for sp_start, sp_end, speaker_label in speaker_intervals:
-        overlap = min(end_time, sp_end) - max(start_time, sp_start)
-        if overlap > max_overlap:
-            max_overlap = overlap
-            max_overlap_speaker = speaker_label
-    
-    return max_overlap_speaker
-
-def detect_speaker_change(syl_intervals, speaker_intervals):
+def assign_speakers(syl_intervals, speaker_intervals):
+    """
+    Assign a speaker to every syllable in one sweep over both tiers.
+
+    Both lists must be sorted by time with non-overlapping intervals, as in a
+    TextGrid tier. Each syllable gets the speaker whose interval overlaps it the longest
+    (the first one on ties), or None if no speaker interval overlaps it.
+    """
+    speakers = []
+    num_speakers = len(speaker_intervals)
+    j = 0
+    for start, end, _ in syl_intervals:
+        # Speaker intervals ending before this syllable cannot overlap it or any later syllable
+        while j < num_speakers and speaker_intervals[j][1] <= start:
+            j += 1
+
+        max_overlap = 0
+        max_overlap_speaker = None
+        k = j
+        while k < num_speakers and speaker_intervals[k][0] < end:
+            sp_start, sp_end, speaker_label = speaker_intervals[k]
+            overlap = min(end, sp_end) - max(start, sp_start)
+            if overlap > max_overlap:
+                max_overlap = overlap
+                max_overlap_speaker = speaker_label
+            k += 1
+        speakers.append(max_overlap_speaker)
+
+    return speakers
+
+def assign_speakers_vectorized(syl_intervals, speaker_intervals):
+    """
+    Vectorized variant of assign_speakers.
+
+    Candidate speaker intervals for each syllable are located with
+    np.searchsorted and the overlap is maximised over a padded
+    (syllables x candidates) matrix.
+    """
+    import numpy as np
+
+    if not syl_intervals:
+        return []
+    if not speaker_intervals:
+        return [None] * len(syl_intervals)
+
+    syl_starts = np.array([t[0] for t in syl_intervals], dtype=float)
+    syl_ends = np.array([t[1] for t in syl_intervals], dtype=float)
+    sp_starts = np.array([t[0] for t in speaker_intervals], dtype=float)
+    sp_ends = np.array([t[1] for t in speaker_intervals], dtype=float)
+
+    # Candidates are speaker intervals with sp_end > start and sp_start < end
+    lo = np.searchsorted(sp_ends, syl_starts, side='right')
+    hi = np.searchsorted(sp_starts, syl_ends, side='left')
+    width = max(int((hi - lo).max()), 1)
+
+    candidates = lo[:, None] + np.arange(width)[None, :]
+    valid = candidates < hi[:, None]
+    candidates = np.minimum(candidates, len(speaker_intervals) - 1)
+
+    overlaps = np.minimum(syl_ends[:, None], sp_ends[candidates]) - np.maximum(syl_starts[:, None], sp_starts[candidates])
+    overlaps[~valid] = 0
+    best = overlaps.argmax(axis=1)
+    best_overlap = overlaps[np.arange(len(syl_intervals)), best]
+    best_index = candidates[np.arange(len(syl_intervals)), best]
+
+    return [speaker_intervals[idx][2] if overlap > 0 else None for idx, overlap in zip(best_index, best_overlap)]
+
+def detect_speaker_change(syl_intervals, speaker_intervals, vectorized=False):
     speaker_change_tier = []
 
+    # Compute each syllable's speaker once and reuse it for the neighbour comparison
+    if vectorized:
+        speakers = assign_speakers_vectorized(syl_intervals, speaker_intervals)
+    else:
+        speakers = assign_speakers(syl_intervals, speaker_intervals)
+
     for i, (start, end, _) in enumerate(syl_intervals):
-        current_speaker = get_speaker(start, end, speaker_intervals)
+        current_speaker = speakers[i]
 
         # Check if adjacent intervals are available and extract their speakers
-        prev_speaker = get_speaker(*syl_intervals[i-1][:2], speaker_intervals) if i > 0 else ''
-        next_speaker = get_speaker(*syl_intervals[i+1][:2], speaker_intervals) if i < len(syl_intervals) - 1 else ''
+        prev_speaker = speakers[i-1] if i > 0 else ''
+        next_speaker = speakers[i+1] if i < len(syl_intervals) - 1 else ''
         
         # Determine if there is a speaker change
         is_change = current_speaker!='' and     ((prev_speaker!='' and current_speaker != prev_speaker) or (next_speaker!='' and current_speaker != next_speaker))
@@ -33,7 +94,7 @@ def detect_speaker_change(syl_intervals, speaker_intervals):
 
     return speaker_change_tier
 
-def main(input_textgrid, output_textgrid):
+def main(input_textgrid, output_textgrid, vectorized=False):
     # Load and parse the TextGrid file
     tg = TextGrid.fromFile(input_textgrid)
 
@@ -45,7 +106,7 @@ def main(input_textgrid, output_textgrid):
     speaker_intervals = tg.getFirst("speaker-ID")
     speaker_intervals = [(interval.minTime, interval.maxTime, interval.mark) for interval in speaker_intervals]
 
-    speaker_change_tier = detect_speaker_change(syl_intervals, speaker_intervals)
+    speaker_change_tier = detect_speaker_change(syl_intervals, speaker_intervals, vectorized)
 
     # Add the new tier to the TextGrid
     new_tier = IntervalTier(name="speaker-change", minTime=min(t[0] for t in speaker_change_tier), maxTime=max(t[1] for t in speaker_change_tier))
@@ -57,7 +118,7 @@ def main(input_textgrid, output_textgrid):
     tg.write(output_textgrid)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python add_speaker-change_tier.py [input.TextGrid] [output.TextGrid]")
+    if len(sys.argv) not in (3, 4) or (len(sys.argv) == 4 and sys.argv[3] != "--vectorized"):
+        print("Usage: python add_speaker-change_tier.py [input.TextGrid] [output.TextGrid] [--vectorized]")
     else:
-        main(sys.argv[1], sys.argv[2])
+        main(sys.argv[1], sys.argv[2], len(sys.argv) == 4)
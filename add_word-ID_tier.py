@@ -3,7 +3,7 @@ import xml.etree.ElementTree as ET
 from textgrid import TextGrid, IntervalTier, Interval
 import string
 import re
-import difflib
+from utils import label_intervals
 
 def parse_word_id(xml_file_path):
     # Parse the XML file
@@ -37,43 +37,7 @@ def word_id_intervals(strd_wrd_sgmnt, word_ids):
     # Remove intervals with square brackets (annonimized names that lack word-IDs)
     strd_wrd_sgmnt = [t for t in strd_wrd_sgmnt if '[' not in t[-1] and ']' not in t[-1]]
 
-    fa_words = [interval[2] for interval in strd_wrd_sgmnt]
-
-    matcher = difflib.SequenceMatcher(None, fa_words, words)
-    aligned = []
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        if tag in {"equal", "replace"}:
-            length = min(i2 - i1, j2 - j1)
-            for k in range(length):
-                interval = strd_wrd_sgmnt[i1 + k]
-                ident = ids[j1 + k]
-                aligned.append((interval[0], interval[1], ident))
-
-            if (j2 - j1) > length:
-                extra_ids = ids[j1 + length:j2]
-                if aligned:
-                    s, e, lbl = aligned[-1]
-                    aligned[-1] = (s, e, f"{lbl} {' '.join(extra_ids)}")
-            elif (i2 - i1) > length:
-                for x in range(i1 + length, i2):
-                    interval = strd_wrd_sgmnt[x]
-                    aligned.append((interval[0], interval[1], fa_words[x]))
-
-        elif tag == "delete":
-            for idx in range(i1, i2):
-                interval = strd_wrd_sgmnt[idx]
-                aligned.append((interval[0], interval[1], fa_words[idx]))
-
-        elif tag == "insert":
-            extra_ids = ids[j1:j2]
-            if aligned:
-                s, e, lbl = aligned[-1]
-                aligned[-1] = (s, e, f"{lbl} {' '.join(extra_ids)}")
-            else:
-                interval = strd_wrd_sgmnt[0]
-                aligned.append((interval[0], interval[1], ' '.join(extra_ids)))
-
-    return aligned
+    return label_intervals(strd_wrd_sgmnt, words, ids)
 
 def main(input_textgrid, input_xml, output_textgrid):
     # Parse XML to get speaker intervals
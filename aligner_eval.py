@@ -4,11 +4,19 @@ import glob
 import string
 import xml.etree.ElementTree as ET
 from utils_tei import timings
+from utils import align_sequences
 from textgrid import TextGrid, IntervalTier, Interval
 import pandas as pd
 import numpy as np
 import csv
 import argparse
+import hashlib
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from fnmatch import fnmatch
+from itertools import repeat
 
 def extract_intervals(in_filepath):
     word_intervals = []
@@ -82,61 +90,238 @@ def intersection_of_filenames(lists_of_file_paths):
     
     return intersection_set
 
-def compute_averages(list_of_lists):
-    # Determine the length of the inner lists
-    inner_list_length = len(list_of_lists[0])
-    
-    # Initialize lists to store sums and counts of the first and second elements of tuples
-    sum_first_elements = [0] * inner_list_length
-    sum_second_elements = [0] * inner_list_length
-    count_first_elements = [0] * inner_list_length
-    count_second_elements = [0] * inner_list_length
-    
-    # First pass: Compute initial averages
-    for tuple_list in list_of_lists:
-        for i, (first, second, _) in enumerate(tuple_list):
-            if first is not None:
-                sum_first_elements[i] += first
-                count_first_elements[i] += 1
-            if second is not None:
-                sum_second_elements[i] += second
-                count_second_elements[i] += 1
-    
-    # Compute the initial averages
-    avg_first_elements = [
-        (sum_first_elements[i] / count_first_elements[i]) if count_first_elements[i] > 0 else None
-        for i in range(inner_list_length)
-    ]
-    avg_second_elements = [
-        (sum_second_elements[i] / count_second_elements[i]) if count_second_elements[i] > 0 else None
-        for i in range(inner_list_length)
-    ]
-    
-    # Reset sums and counts for the second pass
-    sum_first_elements = [0] * inner_list_length
-    count_first_elements = [0] * inner_list_length
-
-    # Second pass: Compute sums and counts excluding outliers
-    outlier_threshold = 1
-    for tuple_list in list_of_lists:
-        for i, (first, _, _) in enumerate(tuple_list):
-            if first is not None and abs(first - avg_first_elements[i]) <= outlier_threshold:
-                sum_first_elements[i] += first
-                count_first_elements[i] += 1
-    
-    # Compute the final averages
-    avg_first_elements = [
-        (sum_first_elements[i] / count_first_elements[i]) if count_first_elements[i] > 0 else None
-        for i in range(inner_list_length)
-    ]
-    avg_second_elements = [
-        (sum_second_elements[i] / count_second_elements[i]) if count_second_elements[i] > 0 else None
-        for i in range(inner_list_length)
-    ]
-    
-    # Construct the result list of tuples
-    result = [(avg_first_elements[i], avg_second_elements[i], list_of_lists[0][i][2]) for i in range(inner_list_length)]
-    return result
+def stack_reference_times(list_of_lists, field):
+    """Stack one field (0 = start, 1 = end) of all reference lists into an (n_refs x n_words) array, NaN where missing."""
+    return np.array([[np.nan if t[field] is None else t[field] for t in tuple_list] for tuple_list in list_of_lists],
+                    dtype=float).reshape(len(list_of_lists), -1)
+
+def nan_column_means(values):
+    """Mean over the rows of every column, ignoring NaN; NaN for columns without values."""
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    sums = np.where(valid, values, 0.0).sum(axis=0)
+    return np.divide(sums, counts, out=np.full(values.shape[1], np.nan), where=counts > 0)
+
+def nan_column_trimmed_means(values, proportion):
+    """Mean over the rows of every column after dropping ``proportion`` of its values at each end, ignoring NaN."""
+    counts = (~np.isnan(values)).sum(axis=0)
+    cut = np.floor(counts * proportion).astype(int)
+    # NaN sorts last, so the valid values of every column come first in ascending order
+    ranks = np.arange(values.shape[0])[:, None]
+    kept = (ranks >= cut) & (ranks < counts - cut)
+    return nan_column_means(np.where(kept, np.sort(values, axis=0), np.nan))
+
+def compute_averages(list_of_lists, center="mean", outlier_threshold=1, trim_proportion=0.25):
+    """
+    Average corresponding intervals of several references.
+
+    Start times are averaged in two passes: a center of each word's start times is computed
+    ("mean", "median" or "trimmed" mean without trim_proportion of the values at each end),
+    then starts further than outlier_threshold seconds from it are dropped and the rest are
+    averaged. End times are plain means.
+    Missing times (None) are ignored; words without any times get None.
+    """
+    starts = stack_reference_times(list_of_lists, 0)
+    ends = stack_reference_times(list_of_lists, 1)
+
+    # First pass: center of the start times of every word
+    if center == "mean":
+        start_center = nan_column_means(starts)
+    elif center == "median":
+        start_center = np.full(starts.shape[1], np.nan)
+        has_values = ~np.isnan(starts).all(axis=0)
+        start_center[has_values] = np.nanmedian(starts[:, has_values], axis=0)
+    elif center == "trimmed":
+        start_center = nan_column_trimmed_means(starts, trim_proportion)
+    else:
+        raise ValueError(f"Unknown center statistic: {center}")
+
+    # Second pass: average excluding outliers
+    with np.errstate(invalid="ignore"):
+        inliers = np.abs(starts - start_center) <= outlier_threshold
+    avg_starts = nan_column_means(np.where(inliers, starts, np.nan))
+    avg_ends = nan_column_means(ends)
+
+    def to_list(values):
+        return [None if np.isnan(v) else v for v in values.tolist()]
+
+    return list(zip(to_list(avg_starts), to_list(avg_ends), [t[2] for t in list_of_lists[0]]))
+
+def resolve_filepath(dir, base_name, extension):
+    """Path of the file with the given basename in dir, preferring its '-avd' variant if it exists."""
+    filepath_avd = os.path.join(dir, base_name + "-avd" + extension)
+    if os.path.exists(filepath_avd):
+        return filepath_avd
+    return os.path.join(dir, base_name + extension)
+
+def evaluation_key(base_name, dirs, extensions, options):
+    """Hash of the contents of all input files of one basename and of the evaluation options."""
+    key = hashlib.sha1(json.dumps(options, sort_keys=True).encode("utf-8"))
+    for dir, extension in zip(dirs, extensions):
+        filepath = resolve_filepath(dir, base_name, extension)
+        key.update(filepath.encode("utf-8"))
+        if os.path.exists(filepath):
+            with open(filepath, "rb") as file:
+                key.update(hashlib.sha1(file.read()).digest())
+    return key.hexdigest()
+
+# Number of newly evaluated files stored per SQLite transaction
+STORE_COMMIT_INTERVAL = 20
+
+def open_result_store(store_path):
+    """Open (and create if needed) the SQLite store of per-file evaluation results."""
+    connection = sqlite3.connect(store_path)
+    connection.execute("""CREATE TABLE IF NOT EXISTS results (
+        base_name TEXT PRIMARY KEY, key TEXT NOT NULL, lines TEXT NOT NULL,
+        differences BLOB, matched INTEGER, total INTEGER)""")
+    return connection
+
+def load_result(connection, base_name, key):
+    """Stored result of a file in the format returned by evaluate_file, or None if it is missing or outdated."""
+    row = connection.execute("SELECT lines, differences, matched, total FROM results WHERE base_name = ? AND key = ?",
+                             (base_name, key)).fetchone()
+    if row is None:
+        return None
+    lines, differences, matched, total = row
+    return (json.loads(lines), None if differences is None else np.frombuffer(differences),
+            None if matched is None else (matched, total))
+
+def save_result(connection, base_name, key, result):
+    """Store the result of evaluate_file for a file, replacing any previous result."""
+    lines, differences, coverage = result
+    if differences is not None:
+        differences = np.asarray(differences, dtype=float).tobytes()
+    matched, total = coverage if coverage else (None, None)
+    connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                       (base_name, key, json.dumps(lines), differences, matched, total))
+
+def stored_results(connection, pattern="*", keys=None):
+    """
+    Stored (differences, coverage) of all evaluated files whose basename matches the shell-style pattern.
+
+    With keys (basename -> evaluation_key of the current inputs), only files that are among the current
+    inputs and whose stored result is up to date are included; otherwise every file ever stored counts.
+    """
+    rows = connection.execute("SELECT base_name, key, differences, matched, total FROM results WHERE differences IS NOT NULL ORDER BY base_name")
+    return [(np.frombuffer(differences), None if matched is None else (matched, total))
+            for base_name, key, differences, matched, total in rows
+            if fnmatch(base_name, pattern) and (keys is None or keys.get(base_name) == key)]
+
+def print_overall_statistics(all_differences, matched_words=0, total_words=0):
+    """Print the mean, median, coverage and tolerance ratios of a list of per-file difference arrays."""
+    all_differences = np.hstack(all_differences)
+    print(f"Overall mean difference: {round(np.mean(all_differences), 1)}")
+    print(f"Overall median difference: {round(np.median(all_differences), 1)}")
+    if total_words:
+        print(f"Overall coverage: {round(100 * matched_words / total_words, 1)}% ({matched_words}/{total_words} words)")
+
+    # Calculate percentages for each tolerance
+    tolerances = [10, 50, 100]
+    for tolerance in tolerances:
+        ratio = calculate_tolerance_ratio(all_differences, tolerance)
+        print(f"Ratio of boundaries within {tolerance}ms tolerance: {round(ratio, 2)}")
+
+def normalize_word(word):
+    """Lowercase a word and strip surrounding punctuation for comparing test and reference words."""
+    return word.lower().strip(string.punctuation)
+
+def evaluate_file(base_name, dirs, extensions, verbose=False, csv_dir=None, center="mean", align=False):
+    """
+    Compare the test intervals of one file with its reference intervals.
+
+    The first entry of dirs/extensions points to the test intervals, the others to the references.
+    By default the test and reference words are paired by position and files with a different number
+    of words are skipped. With align=True the two word sequences are aligned by their text and only
+    the matched words are compared.
+    Returns the lines to print, the array of word start differences in ms (None if the file is skipped)
+    and the coverage as (matched words, reference words) (None unless align is set).
+    Nothing is printed here, so that files can be evaluated in worker processes.
+    """
+    lines = []
+
+    # Construct FA filepath by matching the basename and using the FA extension
+    fa_filepath = resolve_filepath(dirs[0], base_name, extensions[0])
+
+    # Check if the FA file exists
+    if not os.path.exists(fa_filepath):
+        lines.append(f"Warning: No corresponding FA file found for {base_name}")
+        return lines, None, None
+
+    try:
+        FA_words = extract_intervals(fa_filepath)
+    except Exception as e:
+        lines.append(f"Skipping {fa_filepath}. Check for overlapping inervals.")
+        return lines, None, None
+
+    # Reference intervals, averaged over the references when there are several
+    GT_words = []
+    for n in range(1, len(dirs)):
+        gt_filepath = resolve_filepath(dirs[n], base_name, extensions[n])
+        try:
+            GT_words.append(extract_intervals(gt_filepath))
+        except Exception as e:
+            lines.append(f"Skipping {gt_filepath}. Check for overlapping inervals.")
+            return lines, None, None
+
+    if not GT_words:
+        lines.append(f"Warning: Skipping file {base_name} since no reference intervals were given.")
+        return lines, None, None
+
+    if not all(len(lst) == len(GT_words[0]) for lst in GT_words):
+        lines.append(f"Warning: Skipping file {gt_filepath} since the length of GT sets differ.")
+        return lines, None, None
+
+    GT_words = compute_averages(GT_words, center)
+
+    coverage = None
+    if align:
+        # Pair the words matched by a sequence alignment of the GT and FA transcripts
+        opcodes = align_sequences([normalize_word(t[2]) for t in GT_words], [normalize_word(t[2]) for t in FA_words])
+        word_pairs = [(GT_words[i1 + k], FA_words[j1 + k])
+                      for tag, i1, i2, j1, j2 in opcodes if tag == "equal" for k in range(i2 - i1)]
+        coverage = (len(word_pairs), len(GT_words))
+    elif len(GT_words) != len(FA_words):
+        lines.append(f"Warning: Skipping file {gt_filepath} since the number of GT words is different than FA words ({len(GT_words)} != {len(FA_words)}).")
+        return lines, None, None
+    else:
+        word_pairs = list(zip(GT_words, FA_words))
+
+    if all(t[0] is None for t in GT_words):
+        lines.append(f"Warning: Skipping file {gt_filepath} since it has no GT annotations.")
+        return lines, None, None
+
+    # Aligning and computing the differences
+    aligned_words = [(t1, t2) for t1, t2 in word_pairs if None not in t1]
+    if not aligned_words:
+        lines.append(f"Warning: Skipping file {gt_filepath} since no annotated GT words match the FA words.")
+        return lines, None, None
+    GT_words, FA_words = zip(*aligned_words)
+    GT_start = np.array([elem[0] for elem in GT_words])
+    FA_start = np.array([elem[0] for elem in FA_words])
+    differences = np.abs(GT_start - FA_start) * 1000
+
+    if verbose:
+        # Print largest 10 differences
+        word_differences = list(zip(differences, GT_words, FA_words))
+        word_differences.sort(key=lambda x: x[0], reverse=False)
+        word_differences = word_differences[-9:]
+        lines.append('Largest 10 differences')
+        for diff, gt_word, fa_word in word_differences:
+            lines.append(f"Difference: {diff:.2f}ms, GT_word: {gt_word}, FA_word: {fa_word}")
+
+    summary = f"{base_name}: Mean diff. = {round(np.mean(differences), 2)}, median diff. = {round(np.median(differences), 2)}"
+    if coverage:
+        summary += f", coverage = {round(100 * coverage[0] / coverage[1], 1)}% ({coverage[0]}/{coverage[1]} words)"
+    lines.append(summary)
+
+    # Optionally write interval starts for each word into csv
+    if csv_dir:
+        all_data = [(a, x, c) for ((a, _, c), (x, _, _)) in zip(GT_words, FA_words)]
+        with open(os.path.join(csv_dir, base_name + '.csv'), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerows(all_data)
+
+    return lines, differences, coverage
 
 if __name__ == "__main__":
     # Call examples:
@@ -144,16 +329,33 @@ if __name__ == "__main__":
     # python aligner_eval.py "data/nemo/output/GosVL/ctm/words/GosVL*.ctm" "data/Gos.TEI.2.1/GosVL/GosVL*.xml" "data/gos_processed/GosVL/TextGrid_final/GosVL*.TextGrid"
 
     parser = argparse.ArgumentParser(description='Evaluate the alignments between the test and the referece forced alignments.')
-    parser.add_argument('all_intervals', nargs='+', default=[],
+    parser.add_argument('all_intervals', nargs='*', default=[],
     help='''A list of strings representing files containing time intervals.
     First string points to test intervals, others point to reference intervals.
     If multiple reference strings are provided an average is computed over corresponding intervals.''')
     parser.add_argument('--verbose', action='store_true', help='Print detailed information')
     parser.add_argument('--csv', type=str, default=[], help='Store differences into directory defined here')
+    parser.add_argument('--center', choices=['mean', 'median', 'trimmed'], default='mean',
+                        help='Statistic of the reference start times used to discard outliers before averaging (mean, median or a mean without the lowest and highest quarter; default: mean)')
+    parser.add_argument('--align', action='store_true',
+                        help='Align the test and reference words by their text instead of skipping files with a different number of words')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes used to evaluate files in parallel (default: 1)')
+    parser.add_argument('--store', type=str, default=None,
+                        help='SQLite file storing per-file results; files whose inputs did not change are not re-evaluated (--csv is only written for re-evaluated files)')
+    parser.add_argument('--report', type=str, default=None, metavar='PATTERN',
+                        help='Print overall statistics of the stored files whose basename matches PATTERN (e.g. "GosVL*") without evaluating; '
+                             'with input patterns only current, up-to-date files are included, otherwise every stored file')
+    parser.add_argument('--chunksize', type=int, default=4, help='Number of files sent to a worker at once in parallel mode (default: 4)')
 
     args = parser.parse_args()
     all_intervals = args.all_intervals
     verbose = args.verbose
+    store = open_result_store(args.store) if args.store else None
+
+    if args.report and store is None:
+        parser.error("--report requires --store")
+    if not all_intervals and not args.report:
+        parser.error("the test and reference file patterns are required unless --report is given")
 
     # Extracting the directory and file extension for both patterns
     dirs, extensions, gt_intervals =  [], [], []
@@ -167,88 +369,67 @@ if __name__ == "__main__":
     gt_files = sorted(gt_files)
     all_differences = []
 
-    for base_name in gt_files:
-        continue_outer = True
-        # Construct FA filepath by matching the basename and using the FA extension
-        fa_filepath = os.path.join(dirs[0], base_name + extensions[0])
-        fa_filepath_avd = os.path.join(dirs[0], base_name + "-avd" + extensions[0])
-        if os.path.exists(fa_filepath_avd):
-            fa_filepath = fa_filepath_avd
-
-        # Check if the FA file exists
-        if not os.path.exists(fa_filepath):
-            print(f"Warning: No corresponding FA file found for {gt_filepath}")
-            continue
-        
-        GT_words = []
-        for n, dir in enumerate(dirs):
-            gt_filepath = os.path.join(dir, base_name + extensions[n])
-            gt_filepath_avd = os.path.join(dir, base_name + "-avd" + extensions[n])
-            if os.path.exists(gt_filepath_avd):
-                gt_filepath = gt_filepath_avd
-            try:
-                GT_words.append(extract_intervals(gt_filepath))
-            except Exception as e:
-                print(f"Skipping {gt_filepath}. Check for overlapping inervals.")
-                continue_outer = False
-                break
-
-        if continue_outer:
-            if not all(len(lst) == len(GT_words[0]) for lst in GT_words):
-                print(f"Warning: Skipping file {gt_filepath} since the length of GT sets differ.")
-                continue
-            
-            if len(GT_words) > 1:
-                GT_words = compute_averages(GT_words[1:])
+    keys = {}
+    if store is not None:
+        options = {"center": args.center, "align": args.align, "verbose": verbose}
+        for base_name in gt_files:
+            keys[base_name] = evaluation_key(base_name, dirs, extensions, options)
+
+    if args.report:
+        # Without input patterns the report covers every file in the store
+        results = stored_results(store, args.report, keys if all_intervals else None)
+        if not results:
+            print(f"No stored results for files matching {args.report}")
+        else:
+            print(f"Files: {len(results)}")
+            coverages = [coverage for _, coverage in results if coverage]
+            print_overall_statistics([differences for differences, _ in results],
+                                     sum(c[0] for c in coverages), sum(c[1] for c in coverages))
+        raise SystemExit
+
+    # Reuse stored results of files whose inputs and options did not change
+    cached = {}
+    if store is not None:
+        for base_name in gt_files:
+            result = load_result(store, base_name, keys[base_name])
+            if result is not None:
+                cached[base_name] = result
+    pending = [base_name for base_name in gt_files if base_name not in cached]
+
+    # Files are evaluated in parallel; map yields results in input order, so the output stays deterministic
+    with ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else nullcontext() as pool:
+        if pool is not None:
+            computed = pool.map(evaluate_file, pending, repeat(dirs), repeat(extensions), repeat(verbose), repeat(args.csv),
+                                repeat(args.center), repeat(args.align), chunksize=args.chunksize)
+        else:
+            computed = (evaluate_file(base_name, dirs, extensions, verbose, args.csv, args.center, args.align) for base_name in pending)
+
+        matched_words, total_words, stored = 0, 0, 0
+        for base_name in gt_files:
+            if base_name in cached:
+                result = cached[base_name]
             else:
-                GT_words = GT_words[1]
-
-            try:
-                FA_words = extract_intervals(fa_filepath)
-            except Exception as e:
-                print(f"Skipping {fa_filepath}. Check for overlapping inervals.")
-                continue
-            if len(GT_words) != len(FA_words):
-                print(f"Warning: Skipping file {gt_filepath} since the number of GT words is different than FA words ({len(GT_words)} != {len(FA_words)}).")
-                continue
-
-            if all(t[0] is None for t in GT_words):
-                print(f"Warning: Skipping file {gt_filepath} since it has no GT annotations.")
-                continue
-
-            # Aligning and computing the differences
-            aligned_words = [(t1, t2) for t1, t2 in zip(GT_words, FA_words) if None not in t1]
-            GT_words, FA_words = zip(*aligned_words)
-            GT_start = np.array([elem[0] for elem in GT_words])
-            FA_start = np.array([elem[0] for elem in FA_words])
-            differences = np.abs(GT_start - FA_start) * 1000
-
-            if args.verbose:
-                # Print largest 10 differences
-                word_differences = list(zip(differences, GT_words, FA_words))
-                word_differences.sort(key=lambda x: x[0], reverse=False)
-                word_differences = word_differences[-9:]
-                print('Largest 10 differences')
-                for diff, gt_word, fa_word in word_differences:
-                    print(f"Difference: {diff:.2f}ms, GT_word: {gt_word}, FA_word: {fa_word}")
-
-            print(f"{base_name}: Mean diff. = {round(np.mean(differences), 2)}, median diff. = {round(np.median(differences), 2)}")
-
-            # Optionally write interval starts for each word into csv
-            if args.csv:
-                all_data = [(a, x, c) for ((a, _, c), (x, _, _)) in zip(GT_words, FA_words)]
-                with open(os.path.join(args.csv, base_name + '.csv'), 'w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerows(all_data)
-            all_differences.append(differences)
+                result = next(computed)
+                if store is not None:
+                    save_result(store, base_name, keys[base_name], result)
+                    stored += 1
+                    # Commit in batches, so an interrupted run keeps the files evaluated so far
+                    if stored % STORE_COMMIT_INTERVAL == 0:
+                        store.commit()
+            lines, differences, coverage = result
+            for line in lines:
+                print(line)
+            if differences is not None:
+                all_differences.append(differences)
+            if coverage:
+                matched_words += coverage[0]
+                total_words += coverage[1]
+
+    if store is not None:
+        store.commit()
+        store.close()
+        if gt_files:
+            print(f"Re-evaluated {len(pending)} of {len(gt_files)} files, results stored in {args.store}")
 
     if all_differences:
-        all_differences = np.hstack(all_differences)
-        print(f"Overall mean difference: {round(np.mean(all_differences), 1)}")
-        print(f"Overall median difference: {round(np.median(all_differences), 1)}")
-
-        # Calculate percentages for each tolerance
-        tolerances = [10, 50, 100]
-        for tolerance in tolerances:
-            ratio = calculate_tolerance_ratio(all_differences, tolerance)
-            print(f"Ratio of boundaries within {tolerance}ms tolerance: {round(ratio, 2)}")
+        print_overall_statistics(all_differences, matched_words, total_words)
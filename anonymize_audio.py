@@ -1,50 +1,85 @@
 import xml.etree.ElementTree as ET
-from pydub import AudioSegment
-from pydub.generators import Sine
+import hashlib
+import json
 import numpy as np
 import argparse
+from functools import lru_cache
 from pathlib import Path
 import sys
 from textgrid import TextGrid
-from numpy import inf
-import spacy
 
-def get_audio_level(audio_segment, start_ms, end_ms, window_ms=500):
-    """Calculate the average volume of audio in a window around the given interval."""
-    window_start = max(0, start_ms - window_ms)
-    window_end = min(len(audio_segment), end_ms + window_ms)
-    
-    surrounding_audio = audio_segment[window_start:window_end]
-    return surrounding_audio.rms
-
-def generate_beep(duration_ms, target_rms, frequency=1000):
-    """Generate a beep sound of given duration, frequency, and volume."""
-    samples = np.sin(2 * np.pi * frequency * np.arange(duration_ms * 44.1) / 44100)
-    samples = (samples * 32767).astype(np.int16)
-    beep = AudioSegment(
-        samples.tobytes(), 
-        frame_rate=44100,
-        sample_width=2,
-        channels=1
-    )
-    
-    current_rms = beep.rms
-    if current_rms > 0:
-        gain_change = target_rms / current_rms
-        gain_change *= 0.7
-        beep = beep.apply_gain(20 * np.log10(gain_change))
-    
-    return beep
+# pydub and spaCy are imported inside the functions that use them, so that
+# each mode only pays for the dependencies it needs (TRS mode never loads spaCy).
 
-def apply_fade(audio_segment, duration_ms):
-    """Safely apply fade in and fade out to an audio segment."""
-    if duration_ms <= 0:
-        return audio_segment
-    
-    try:
-        return audio_segment.fade_in(duration_ms).fade_out(duration_ms)
-    except:
-        return audio_segment
+def render_beeps(audio, intervals_ms, replace=False, frequency=1000, gain=0.7, max_fade_ms=10, window_ms=500):
+    """
+    Cover all intervals of an AudioSegment with beeps in a single pass.
+
+    Every interval gets a beep at the source sample rate whose RMS is ``gain``
+    times the RMS of the original audio in a ``window_ms`` window around the
+    interval, with linear fades of up to ``max_fade_ms`` (at most a quarter of
+    the interval). Overlapping beeps are merged into one span and either mixed
+    with the audio (``replace=False``) or substituted for it (``replace=True``).
+    Only the covered spans and their level windows are converted to floats; the
+    output is built from one integer copy of the samples.
+    """
+    from pydub import AudioSegment
+
+    frame_rate = audio.frame_rate
+    channels = audio.channels
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[audio.sample_width]
+    original = np.frombuffer(audio.raw_data, dtype=dtype).reshape(-1, channels)
+    num_frames = len(original)
+
+    # Beep amplitudes per interval, as (start, end, amplitude) in frames
+    beeps = []
+    for start_ms, end_ms in intervals_ms:
+        start = min(max(int(start_ms * frame_rate / 1000), 0), num_frames)
+        end = min(max(int(end_ms * frame_rate / 1000), start), num_frames)
+        if end == start:
+            continue
+
+        window_start = max(0, int((start_ms - window_ms) * frame_rate / 1000))
+        window_end = min(num_frames, int((end_ms + window_ms) * frame_rate / 1000))
+        window = original[window_start:window_end].astype(np.float64)
+        target_rms = np.sqrt(np.mean(window ** 2))
+
+        # Sine amplitude giving the requested RMS, shaped by fade in and fade out ramps
+        amplitude = np.full(end - start, gain * target_rms * np.sqrt(2))
+        duration_ms = int(end_ms - start_ms)
+        fade = int(min(max_fade_ms, duration_ms // 4) * frame_rate / 1000)
+        if fade > 0:
+            ramp = np.linspace(0.0, 1.0, fade, endpoint=False)
+            amplitude[:fade] *= ramp
+            amplitude[-fade:] *= ramp[::-1]
+        beeps.append((start, end, amplitude))
+
+    # Merge overlapping beeps into spans, so every sample is written once
+    spans = []
+    for start, end, amplitude in sorted(beeps, key=lambda beep: beep[0]):
+        if spans and start < spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+            spans[-1][2].append((start, end, amplitude))
+        else:
+            spans.append([start, end, [(start, end, amplitude)]])
+
+    samples = original.copy()
+    max_value = float(2 ** (8 * audio.sample_width - 1))
+    for span_start, span_end, span_beeps in spans:
+        envelope = np.zeros(span_end - span_start)
+        for start, end, amplitude in span_beeps:
+            section = envelope[start - span_start:end - span_start]
+            np.maximum(section, amplitude, out=section)
+
+        # The phase follows the absolute frame index, as if one tone ran under the whole file
+        tone = envelope * np.sin(2 * np.pi * frequency * np.arange(span_start, span_end) / frame_rate)
+        if replace:
+            mixed = np.repeat(tone[:, None], channels, axis=1)
+        else:
+            mixed = original[span_start:span_end] + tone[:, None]
+        samples[span_start:span_end] = np.clip(np.round(mixed), -max_value, max_value - 1)
+
+    return AudioSegment(samples.tobytes(), frame_rate=frame_rate, sample_width=audio.sample_width, channels=channels)
 
 # TextGrid mode functions
 def get_intervals(input_textgrid):
@@ -54,18 +89,90 @@ def get_intervals(input_textgrid):
         intervals.append((interval.minTime, interval.maxTime, interval.mark))
     return intervals
 
-def identify_names(text):
-    nlp = spacy.load("sl_core_news_trf")
-    doc = nlp(text)
-    names = [ent.text for ent in doc.ents if ent.label_ == "PER"]
-    return names
+# spaCy NER model used for automatic name detection
+NER_MODEL = "sl_core_news_trf"
+
+@lru_cache(maxsize=None)
+def load_ner_model(model_name=NER_MODEL):
+    """Load a spaCy model once per process and reuse it for all files."""
+    import spacy
+
+    return spacy.load(model_name)
+
+def transcript_hash(text):
+    """Key identifying a transcript in the NER cache."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def load_ner_cache(cache_path):
+    """Load cached NER results (transcript hash -> names) from a JSON file."""
+    if cache_path and Path(cache_path).exists():
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
 
-def flexible_compare(input_string, pattern):
-    if pattern.endswith('*'):
-        prefix = pattern[:-1]
-        return input_string.startswith(prefix)
-    else:
-        return input_string == pattern
+def save_ner_cache(cache, cache_path):
+    if cache_path:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+
+def identify_names_batch(texts, cache=None, batch_size=8):
+    """
+    Identify person names in several transcripts with a single nlp.pipe pass.
+
+    Results are looked up in and stored to ``cache`` (a dict keyed by transcript hash),
+    so unchanged transcripts are never processed twice.
+    """
+    cache = {} if cache is None else cache
+    keys = [transcript_hash(text) for text in texts]
+    pending = {key: text for key, text in zip(keys, texts) if key not in cache}
+    if pending:
+        nlp = load_ner_model()
+        for key, doc in zip(pending, nlp.pipe(pending.values(), batch_size=batch_size)):
+            cache[key] = [ent.text for ent in doc.ents if ent.label_ == "PER"]
+    return [cache[key] for key in keys]
+
+def identify_names(text, cache=None):
+    return identify_names_batch([text], cache)[0]
+
+def keywords_from_names(names):
+    """Split detected names into unique single-word keywords."""
+    return list(set(word for item in names for word in item.split()))
+
+def compile_keywords(keywords):
+    """
+    Compile keywords into an exact-match set and a character trie of prefix patterns.
+
+    Keywords are lowercased; a keyword ending in '*' matches every word starting with
+    the preceding characters. In the trie, the None key marks the end of a prefix.
+    """
+    exact = set()
+    prefixes = {}
+    for keyword in keywords:
+        keyword = keyword.lower()
+        if keyword.endswith('*'):
+            node = prefixes
+            for char in keyword[:-1]:
+                node = node.setdefault(char, {})
+            node[None] = True
+        else:
+            exact.add(keyword)
+    return exact, prefixes
+
+def match_keywords(text, compiled_keywords):
+    """Check whether text matches any of the keywords compiled with compile_keywords (exact words, or prefixes for keywords ending in '*')."""
+    exact, prefixes = compiled_keywords
+    text = text.lower()
+    if text in exact:
+        return True
+    node = prefixes
+    for char in text:
+        if None in node:
+            return True
+        node = node.get(char)
+        if node is None:
+            return False
+    return None in node
 
 def find_next_turn_start_time(turn, root):
     """Find the start time of the next Turn element."""
@@ -135,68 +242,96 @@ def parse_trs_file(trs_path):
     
     return background_intervals
 
-def anonymize_audio_textgrid(input_wav, input_textgrid, output_wav, keywords=[]):
-    """Anonymize audio using TextGrid mode."""
-    intervals = get_intervals(input_textgrid)
+def anonymize_audio_textgrid(input_wav, input_textgrid, output_wav, keywords=None, ner_cache=None, intervals=None):
+    """
+    Anonymize audio using TextGrid mode.
+
+    With keywords=None the keywords are the names detected by NER in the transcript;
+    an empty list anonymizes nothing.
+    """
+    if intervals is None:
+        intervals = get_intervals(input_textgrid)
     
-    if not keywords:
+    if keywords is None:
         text = " ".join([tup[-1] for tup in intervals])
-        keywords = identify_names(text)
-        keywords = [word for item in keywords for word in item.split()]
-        keywords = list(set(keywords))
+        keywords = keywords_from_names(identify_names(text, ner_cache))
         print(f"Identified keywords containing personal information: {keywords}")
     
-    audio = AudioSegment.from_wav(input_wav)
+    from pydub import AudioSegment
+
+    compiled_keywords = compile_keywords(keywords)
     anonymized_intervals = []
     
     for xmin, xmax, text in intervals:
-        for keyword in keywords:
-            if flexible_compare(text.lower(), keyword.lower()):
-                print(f"Anonymizing part from {xmin}s to {xmax}s: {text}")
-                duration_ms = int((xmax - xmin) * 1000)
-                target_rms = get_audio_level(audio, int(xmin * 1000), int(xmax * 1000))
-                beep = generate_beep(duration_ms, target_rms)
-                
-                # Apply fade
-                fade_ms = min(10, duration_ms // 4)
-                if fade_ms > 0:
-                    beep = apply_fade(beep, fade_ms)
-                    
-                audio = audio.overlay(beep, position=int(xmin * 1000))
-                anonymized_intervals.append((xmin, xmax, text))
+        # Each interval is anonymized once, however many keywords it matches
+        if match_keywords(text, compiled_keywords):
+            print(f"Anonymizing part from {xmin}s to {xmax}s: {text}")
+            anonymized_intervals.append((xmin, xmax, text))
     
+    # Mix the beeps for all matched intervals into the audio in one pass
+    audio = AudioSegment.from_wav(input_wav)
+    audio = render_beeps(audio, [(xmin * 1000, xmax * 1000) for xmin, xmax, _ in anonymized_intervals])
     audio.export(output_wav, format='wav')
     print(f"Anonymized audio saved to: {output_wav}")
     return anonymized_intervals
 
 def anonymize_audio_trs(input_wav, input_trs, output_wav):
     """Anonymize audio using TRS mode."""
+    from pydub import AudioSegment
+
     audio = AudioSegment.from_wav(input_wav)
     intervals = parse_trs_file(input_trs)
     
-    for start_ms, end_ms, text in intervals:
-        duration_ms = end_ms - start_ms
-        target_rms = get_audio_level(audio, start_ms, end_ms)
-        beep = generate_beep(duration_ms, target_rms)
-        
-        fade_ms = min(10, duration_ms // 4)
-        if fade_ms > 0:
-            beep = apply_fade(beep, fade_ms)
-        
-        audio = audio[:start_ms] + beep + audio[end_ms:]
+    # Replace all background intervals with beeps in one pass
+    audio = render_beeps(audio, [(start_ms, end_ms) for start_ms, end_ms, _ in intervals], replace=True)
     
     audio.export(output_wav, format='wav')
     print(f"Anonymized audio saved to: {output_wav}")
 
+def anonymize_directory_textgrid(wav_dir, textgrid_dir, output_dir, keywords=None, ner_cache_path=None, batch_size=8):
+    """
+    Anonymize all TextGrid/WAV pairs of a directory in one process.
+
+    Without keywords, names in all transcripts are detected with one batched NER
+    pass over the files that are not yet in the NER cache.
+    """
+    textgrid_files = sorted(Path(textgrid_dir).glob("*.TextGrid"))
+    pairs = []
+    for textgrid_file in textgrid_files:
+        wav_file = Path(wav_dir) / (textgrid_file.stem + ".wav")
+        if not wav_file.exists():
+            print(f"Warning: No matching WAV file for {textgrid_file.name} - skipping")
+            continue
+        pairs.append((wav_file, textgrid_file, get_intervals(str(textgrid_file))))
+
+    file_keywords = [keywords] * len(pairs)
+    if keywords is None:
+        ner_cache = load_ner_cache(ner_cache_path)
+        texts = [" ".join([tup[-1] for tup in intervals]) for _, _, intervals in pairs]
+        file_keywords = [keywords_from_names(names) for names in identify_names_batch(texts, ner_cache, batch_size)]
+        save_ner_cache(ner_cache, ner_cache_path)
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    for (wav_file, textgrid_file, intervals), kws in zip(pairs, file_keywords):
+        print(f"\nProcessing: {textgrid_file.name}")
+        if keywords is None:
+            print(f"Identified keywords containing personal information: {kws}")
+        anonymize_audio_textgrid(str(wav_file), str(textgrid_file), str(Path(output_dir) / wav_file.name), kws,
+                                 intervals=intervals)
+
 def main():
     parser = argparse.ArgumentParser(description='Audio anonymizer with TextGrid and TRS support')
-    parser.add_argument('mode', choices=['textgrid', 'trs'], help='Anonymization mode (textgrid or trs)')
-    parser.add_argument('input_wav', help='Input WAV file')
-    parser.add_argument('input_file', help='Input TextGrid or TRS file')
-    parser.add_argument('output_wav', help='Output WAV file')
+    parser.add_argument('mode', choices=['textgrid', 'trs', 'textgrid-batch'], help='Anonymization mode (textgrid, trs, or textgrid-batch for whole directories)')
+    parser.add_argument('input_wav', help='Input WAV file (WAV directory in textgrid-batch mode)')
+    parser.add_argument('input_file', help='Input TextGrid or TRS file (TextGrid directory in textgrid-batch mode)')
+    parser.add_argument('output_wav', help='Output WAV file (output directory in textgrid-batch mode)')
     parser.add_argument('--keywords', nargs='*', help='Keywords to anonymize (TextGrid mode only), e.g. [*, to anonymize all text in square brackets')
+    parser.add_argument('--ner_cache', help='JSON file caching detected names per transcript hash (TextGrid modes only)')
+    parser.add_argument('--batch_size', type=int, default=8, help='Number of transcripts per spaCy batch (default: 8)')
     
     args = parser.parse_args()
+    # Without keywords (or with an empty --keywords) names are detected by NER
+    keywords = args.keywords or None
     
     # Ensure input files exist
     if not Path(args.input_wav).exists():
@@ -204,13 +339,19 @@ def main():
     if not Path(args.input_file).exists():
         raise FileNotFoundError(f"Input file not found: {args.input_file}")
     
+    if args.mode == 'textgrid-batch':
+        anonymize_directory_textgrid(args.input_wav, args.input_file, args.output_wav, keywords, args.ner_cache, args.batch_size)
+        return
+
     # Create output directory if it doesn't exist
     Path(args.output_wav).parent.mkdir(parents=True, exist_ok=True)
     
     if args.mode == 'textgrid':
-        anonymize_audio_textgrid(args.input_wav, args.input_file, args.output_wav, args.keywords)
+        ner_cache = load_ner_cache(args.ner_cache)
+        anonymize_audio_textgrid(args.input_wav, args.input_file, args.output_wav, keywords, ner_cache)
+        save_ner_cache(ner_cache, args.ner_cache)
     else:  # trs mode
         anonymize_audio_trs(args.input_wav, args.input_file, args.output_wav)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
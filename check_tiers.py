@@ -1,6 +1,7 @@
 import argparse
 import os
 import sys
+from utils_textgrid import scan_tiers, scan_tier_inventories
 
 def check_tiers_in_textgrid(file_path, tiers_to_check):
     """
@@ -10,38 +11,44 @@ def check_tiers_in_textgrid(file_path, tiers_to_check):
     :param tiers_to_check: List of tier names to check.
     :return: Dictionary with tier names as keys and boolean values indicating their presence.
     """
-    # Read the TextGrid file
-    with open(file_path, 'r') as file:
-        textgrid_content = file.read()
+    return tiers_presence_in(scan_tiers(file_path), tiers_to_check)
 
-    # Dictionary to store the presence of tiers
-    tiers_presence = {tier: False for tier in tiers_to_check}
-
-    # Check for each tier in the file
-    for tier in tiers_to_check:
-        if tier in textgrid_content:
-            tiers_presence[tier] = True
+def tiers_presence_in(tiers, tiers_to_check):
+    """
+    Checks which of the specified tiers are in a tier inventory.
 
-    return tiers_presence
+    :param tiers: Tier inventory as returned by utils_textgrid.scan_tiers.
+    :param tiers_to_check: List of tier names to check.
+    :return: Dictionary with tier names as keys and boolean values indicating their presence.
+    """
+    tier_names = {tier["name"] for tier in tiers}
+    return {tier: tier in tier_names for tier in tiers_to_check}
 
-def process_directory(directory, tiers_to_check):
+def process_directory(directory, tiers_to_check, jobs=None):
     """
     Process all TextGrid files in the given directory.
 
+    Only the tier headers of the files are read, by jobs worker processes (all CPUs by default).
+
     :param directory: Directory containing TextGrid files.
     :param tiers_to_check: List of tiers to check.
+    :param jobs: Number of worker processes.
     :return: True if all tiers are present in all files, False otherwise.
     """
     all_tiers_present = True
-    for filename in os.listdir(directory):
-        if filename.endswith('.TextGrid'):
-            file_path = os.path.join(directory, filename)
-            print(f"\nChecking file: {filename}")
-            tiers_presence = check_tiers_in_textgrid(file_path, tiers_to_check)
-            for tier, is_present in tiers_presence.items():
-                if not is_present:
-                    print(f"Error: Tier '{tier}' not present in {filename}")
-                    all_tiers_present = False
+    filenames = [filename for filename in os.listdir(directory) if filename.endswith('.TextGrid')]
+    file_paths = [os.path.join(directory, filename) for filename in filenames]
+    for filename, (_, tiers, error) in zip(filenames, scan_tier_inventories(file_paths, jobs)):
+        print(f"\nChecking file: {filename}")
+        if error:
+            print(f"Error: Could not read {filename}: {error}")
+            all_tiers_present = False
+            continue
+        tiers_presence = tiers_presence_in(tiers, tiers_to_check)
+        for tier, is_present in tiers_presence.items():
+            if not is_present:
+                print(f"Error: Tier '{tier}' not present in {filename}")
+                all_tiers_present = False
     return all_tiers_present
 
 def main():
@@ -54,6 +61,7 @@ def main():
     parser = argparse.ArgumentParser(description='Check for specified tiers in a TextGrid file or all TextGrid files in a directory.')
     parser.add_argument('path', type=str, help='Path to the TextGrid file or directory.')
     parser.add_argument('tiers', nargs='+', help='List of tiers to check.')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes for directories (default: number of CPUs).')
 
     # Parse arguments
     args = parser.parse_args()
@@ -71,7 +79,7 @@ def main():
                 all_tiers_present = False
     elif os.path.isdir(args.path):
         # Directory
-        all_tiers_present = process_directory(args.path, args.tiers)
+        all_tiers_present = process_directory(args.path, args.tiers, args.jobs)
     else:
         print("The specified path is neither a file nor a directory.")
         sys.exit(1)
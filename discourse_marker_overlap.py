@@ -1,8 +1,15 @@
 import sys
 import os
+import io
 import glob
+from bisect import bisect_left
+from contextlib import nullcontext, redirect_stdout
 from textgrid import TextGrid
 from collections import defaultdict, Counter
+from utils import windows_containing_points
+
+# Distance (in seconds) within which boundaries are considered to coincide
+BOUNDARY_THRESHOLD = 0.01
 
 def load_textgrid(filepath):
     return TextGrid.fromFile(filepath)
@@ -32,17 +39,34 @@ def get_subgroup_from_label(label):
     label = clean_label(label.upper())
     return label.split('-')[1]
 
-def check_boundary_overlap(interval1, interval2):
-    """Check if intervals share any boundary points."""
-    threshold = 0.01  # 10ms threshold for boundary matching
-    return (interval1.minTime <= interval2.minTime <= interval1.maxTime) or \
-           (interval1.minTime <= interval2.maxTime <= interval1.maxTime) or \
-           (interval1.maxTime - threshold <= interval2.minTime <= interval1.maxTime + threshold) or \
-           (interval1.minTime - threshold <= interval2.maxTime <= interval1.minTime + threshold)
+def boundary_overlap_flags(intervals, pu_tier):
+    """
+    For each interval, check whether it shares a boundary with any labelled PU interval: a PU boundary lies
+    within the interval, or a PU start or end lies within BOUNDARY_THRESHOLD of its end or start.
+
+    Instead of testing every pair, the PU boundaries are sorted once and swept against the intervals.
+    """
+    threshold = BOUNDARY_THRESHOLD
+    pu_intervals = [pu_interval for pu_interval in pu_tier if pu_interval.mark]
+    pu_starts = [pu_interval.minTime for pu_interval in pu_intervals]
+    pu_ends = [pu_interval.maxTime for pu_interval in pu_intervals]
+
+    # A PU boundary inside the interval, a PU start near its end, or a PU end near its start
+    inside = windows_containing_points([(i.minTime, i.maxTime) for i in intervals], pu_starts + pu_ends)
+    start_near_end = windows_containing_points([(i.maxTime - threshold, i.maxTime + threshold) for i in intervals], pu_starts)
+    end_near_start = windows_containing_points([(i.minTime - threshold, i.minTime + threshold) for i in intervals], pu_ends)
+    return [a or b or c for a, b, c in zip(inside, start_near_end, end_near_start)]
 
-def check_interval_overlap(interval1, interval2):
-    """Check if intervals overlap substantially."""
-    return (interval1.minTime <= interval2.maxTime and interval2.minTime <= interval1.maxTime)
+def overlapping_intervals(intervals, interval_ends, start, end):
+    """
+    Yield the intervals of a time-ordered tier that overlap [start, end], boundaries included.
+
+    interval_ends are the end times of the intervals; the first candidate is found by bisection.
+    """
+    k = bisect_left(interval_ends, start)
+    while k < len(intervals) and intervals[k].minTime <= end:
+        yield intervals[k]
+        k += 1
 
 def check_significant_overlap(interval1, interval2):
     """Check if two intervals have significant overlap (>50%)."""
@@ -79,6 +103,12 @@ def extract_discourse_markers(textgrid):
         # Dictionaries to store markers by group and subgroup
         group_markers = defaultdict(Counter)
         subgroup_markers = defaultdict(Counter)
+
+        # Interval ends of the time-ordered tiers, to look up the intervals overlapping a time span
+        classif_intervals = list(classif_tier)
+        classif_ends = [interval.maxTime for interval in classif_intervals]
+        word_intervals = list(strd_wrd_sgmnt_tier)
+        word_ends = [interval.maxTime for interval in word_intervals]
         
         # Find all intervals with "af" marks in actualDM tier
         for dm_interval in actualDM_tier:
@@ -87,8 +117,8 @@ def extract_discourse_markers(textgrid):
             
             # Find corresponding classification interval for more precise boundaries
             classif_interval = None
-            for interval in classif_tier:
-                if check_interval_overlap(dm_interval, interval) and interval.mark:
+            for interval in overlapping_intervals(classif_intervals, classif_ends, dm_interval.minTime, dm_interval.maxTime):
+                if interval.mark:
                     classif_interval = interval
                     break
             
@@ -105,7 +135,7 @@ def extract_discourse_markers(textgrid):
                 
             # Find all word intervals that have significant overlap with the classification interval
             overlapping_words = []
-            for word_interval in strd_wrd_sgmnt_tier:
+            for word_interval in overlapping_intervals(word_intervals, word_ends, classif_interval.minTime, classif_interval.maxTime):
                 if word_interval.mark.strip() and check_significant_overlap(classif_interval, word_interval):
                     overlapping_words.append(word_interval)
             
@@ -146,11 +176,12 @@ def analyze_overlaps(pu_tier, classif_tier):
         subgroup_totals = defaultdict(int)
         full_labels = defaultdict(str)  # Store full label for each subgroup
         
+        # Check all labelled classification intervals for overlap with any PU boundary at once
+        classif_intervals = [classif_interval for classif_interval in classif_tier if classif_interval.mark]
+        overlap_flags = boundary_overlap_flags(classif_intervals, pu_tier)
+        
         # First count total occurrences and check for overlaps
-        for classif_interval in classif_tier:
-            if not classif_interval.mark:
-                continue
-            
+        for classif_interval, has_overlap in zip(classif_intervals, overlap_flags):
             cleaned_mark = clean_label(classif_interval.mark)
             
             group = get_group_from_label(cleaned_mark)
@@ -163,16 +194,6 @@ def analyze_overlaps(pu_tier, classif_tier):
                 subgroup_totals[subgroup] += 1
                 full_labels[subgroup] = cleaned_mark.upper()
             
-            # Check for overlap with any PU boundary
-            has_overlap = False
-            for pu_interval in pu_tier:
-                if not pu_interval.mark:
-                    continue
-                
-                if check_boundary_overlap(classif_interval, pu_interval):
-                    has_overlap = True
-                    break  # Found an overlap, no need to check other PU intervals
-            
             # If overlap found, increment counters
             if has_overlap:
                 if group:
@@ -188,24 +209,10 @@ def analyze_overlaps(pu_tier, classif_tier):
 
 def analyze_dm_overlaps(pu_tier, dm_tier):
     """Analyze overlaps between actualDM 'af' marks and PU boundaries."""
-    overlaps = 0
-    total = 0
-    
-    # Iterate through DM intervals
-    for dm_interval in dm_tier:
-        if dm_interval.mark != "af":
-            continue
-            
-        total += 1
-        # Check for overlap with any PU boundary
-        for pu_interval in pu_tier:
-            if not pu_interval.mark:
-                continue
-                
-            if check_boundary_overlap(dm_interval, pu_interval):
-                overlaps += 1
-                break  # Count only once per DM interval
-                    
+    # Each DM interval is counted once, however many PU boundaries it shares
+    dm_intervals = [dm_interval for dm_interval in dm_tier if dm_interval.mark == "af"]
+    overlaps = sum(boundary_overlap_flags(dm_intervals, pu_tier))
+    total = len(dm_intervals)
     return overlaps, total
 
 def format_ratio(overlaps, total):
@@ -215,30 +222,41 @@ def format_ratio(overlaps, total):
     percentage = (overlaps / total) * 100
     return f"{overlaps}/{total} ({percentage:.1f}%)"
 
-def process_files(paths):
-    total_group_overlaps = defaultdict(int)
-    total_group_counts = defaultdict(int)
-    total_subgroup_overlaps = defaultdict(int)
-    total_subgroup_counts = defaultdict(int)
-    total_dm_overlaps = 0
-    total_dm_count = 0
-    processed_files = 0
-    skipped_files = 0
-    full_labels = {}  # Store full labels across all files
-    
-    # Dictionaries to store total markers by group and subgroup
-    total_group_markers = defaultdict(Counter)
-    total_subgroup_markers = defaultdict(Counter)
-    
-    for filepath in glob.glob(paths):
+def new_totals():
+    """Empty totals that per-file results are merged into."""
+    return {
+        'group_overlaps': defaultdict(int),
+        'group_counts': defaultdict(int),
+        'subgroup_overlaps': defaultdict(int),
+        'subgroup_counts': defaultdict(int),
+        'dm_overlaps': 0,
+        'dm_count': 0,
+        'processed_files': 0,
+        'skipped_files': 0,
+        'full_labels': {},  # Store full labels across all files
+        # Dictionaries to store total markers by group and subgroup
+        'group_markers': defaultdict(Counter),
+        'subgroup_markers': defaultdict(Counter),
+    }
+
+def analyze_file(filepath):
+    """
+    Analyze a single TextGrid file (map step).
+
+    Returns the partial totals of the file (in the format of new_totals) and the text of its report,
+    which is captured instead of printed so that files can be analyzed in worker processes.
+    """
+    totals = new_totals()
+    output = io.StringIO()
+    with redirect_stdout(output):
         print(f"\nProcessing file: {os.path.basename(filepath)}")
         
         # Load TextGrid file
         tg = load_textgrid(filepath)
         if tg is None:
             print(f"Skipping file {filepath}")
-            skipped_files += 1
-            continue
+            totals['skipped_files'] += 1
+            return totals, output.getvalue()
             
         try:
             # Get required tiers
@@ -248,27 +266,23 @@ def process_files(paths):
             
             if not pu_tier or not classif_tier or not dm_tier:
                 print(f"Required tiers not found in {filepath}")
-                skipped_files += 1
-                continue
+                totals['skipped_files'] += 1
+                return totals, output.getvalue()
             
             # Analyze classification overlaps
             results = analyze_overlaps(pu_tier, classif_tier)
             if results == (None, None, None, None, None):
                 print(f"Error analyzing overlaps in {filepath}")
-                skipped_files += 1
-                continue
+                totals['skipped_files'] += 1
+                return totals, output.getvalue()
                 
             group_overlaps, group_totals, subgroup_overlaps, subgroup_totals, file_labels = results
-            
-            # Update full_labels with new labels from this file
-            for subgroup, label in file_labels.items():
-                if subgroup not in full_labels:
-                    full_labels[subgroup] = label
+            totals['full_labels'].update(file_labels)
             
             # Analyze DM overlaps
             dm_overlaps, dm_count = analyze_dm_overlaps(pu_tier, dm_tier)
-            total_dm_overlaps += dm_overlaps
-            total_dm_count += dm_count
+            totals['dm_overlaps'] = dm_overlaps
+            totals['dm_count'] = dm_count
             
             # Extract discourse markers and their classifications
             group_markers, subgroup_markers = extract_discourse_markers(tg)
@@ -285,20 +299,14 @@ def process_files(paths):
                     marker_strings = [f"'{marker}' ({count})" for marker, count in markers.most_common()]
                     print(f"- {file_labels[subgroup]}: {', '.join(marker_strings)}")
             
-            # Update total marker counts
-            for group, markers in group_markers.items():
-                total_group_markers[group].update(markers)
-            
-            for subgroup, markers in subgroup_markers.items():
-                total_subgroup_markers[subgroup].update(markers)
-            
-            # Add to totals
+            totals['group_markers'].update(group_markers)
+            totals['subgroup_markers'].update(subgroup_markers)
             for group in group_totals:
-                total_group_overlaps[group] += group_overlaps[group]
-                total_group_counts[group] += group_totals[group]
+                totals['group_overlaps'][group] = group_overlaps[group]
+                totals['group_counts'][group] = group_totals[group]
             for subgroup in subgroup_totals:
-                total_subgroup_overlaps[subgroup] += subgroup_overlaps[subgroup]
-                total_subgroup_counts[subgroup] += subgroup_totals[subgroup]
+                totals['subgroup_overlaps'][subgroup] = subgroup_overlaps[subgroup]
+                totals['subgroup_counts'][subgroup] = subgroup_totals[subgroup]
             
             # Print results for this file
             print("\nActualDM overlaps:")
@@ -314,48 +322,92 @@ def process_files(paths):
                 ratio = format_ratio(subgroup_overlaps[subgroup], subgroup_totals[subgroup])
                 print(f"- {file_labels[subgroup]}: {ratio}")
                 
-            processed_files += 1
+            totals['processed_files'] += 1
             
         except Exception as e:
             print(f"Error processing file {filepath}: {str(e)}")
-            skipped_files += 1
-            continue
-    
+            totals['skipped_files'] += 1
+
+    return totals, output.getvalue()
+
+def merge_file_results(totals, file_totals):
+    """Merge the partial totals of a file into the totals (reduce step)."""
+    for key in ('group_overlaps', 'group_counts', 'subgroup_overlaps', 'subgroup_counts'):
+        for label, count in file_totals[key].items():
+            totals[key][label] += count
+    for key in ('group_markers', 'subgroup_markers'):
+        for label, markers in file_totals[key].items():
+            totals[key][label].update(markers)
+    for key in ('dm_overlaps', 'dm_count', 'processed_files', 'skipped_files'):
+        totals[key] += file_totals[key]
+    # Keep the first full label seen for each subgroup
+    for subgroup, label in file_totals['full_labels'].items():
+        if subgroup not in totals['full_labels']:
+            totals['full_labels'][subgroup] = label
+
+def print_totals(totals):
+    """Print the results across all files."""
+    full_labels = totals['full_labels']
+
     # Print total results
-    print(f"\nProcessed {processed_files} files successfully")
-    if skipped_files > 0:
-        print(f"Skipped {skipped_files} files due to errors")
+    print(f"\nProcessed {totals['processed_files']} files successfully")
+    if totals['skipped_files'] > 0:
+        print(f"Skipped {totals['skipped_files']} files due to errors")
         
     print("\nTotal results across all files:")
     
     print("\nActualDM overlaps:")
-    print(f"- 'af' marks: {format_ratio(total_dm_overlaps, total_dm_count)}")
+    print(f"- 'af' marks: {format_ratio(totals['dm_overlaps'], totals['dm_count'])}")
     
     print("\nGroup overlaps:")
-    for group in sorted(total_group_counts.keys()):
-        ratio = format_ratio(total_group_overlaps[group], total_group_counts[group])
+    for group in sorted(totals['group_counts'].keys()):
+        ratio = format_ratio(totals['group_overlaps'][group], totals['group_counts'][group])
         print(f"- Group {group}: {ratio}")
         
     print("\nSubgroup overlaps:")
-    for subgroup in sorted(total_subgroup_counts.keys()):
-        ratio = format_ratio(total_subgroup_overlaps[subgroup], total_subgroup_counts[subgroup])
+    for subgroup in sorted(totals['subgroup_counts'].keys()):
+        ratio = format_ratio(totals['subgroup_overlaps'][subgroup], totals['subgroup_counts'][subgroup])
         print(f"- {full_labels[subgroup]}: {ratio}")
     
     # Print total discourse markers
     print("\nTotal discourse markers by group:")
-    for group, markers in sorted(total_group_markers.items()):
+    for group, markers in sorted(totals['group_markers'].items()):
         marker_strings = [f"'{marker}' ({count})" for marker, count in markers.most_common()]
         print(f"\nGroup {group} markers (total: {sum(markers.values())}): {', '.join(marker_strings)}")
     
     print("\nTotal discourse markers by subgroup:")
-    for subgroup, markers in sorted(total_subgroup_markers.items()):
+    for subgroup, markers in sorted(totals['subgroup_markers'].items()):
         if subgroup in full_labels:
             marker_strings = [f"'{marker}' ({count})" for marker, count in markers.most_common()]
             print(f"\n{full_labels[subgroup]} markers (total: {sum(markers.values())}): {', '.join(marker_strings)}")
 
+def process_files(paths, jobs=1):
+    """
+    Analyze all TextGrid files matching paths and print per-file and total results.
+
+    With jobs > 1 the files are analyzed in worker processes; their partial totals are merged
+    in file order, so the output is the same as in a serial run.
+    """
+    filepaths = glob.glob(paths)
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    else:
+        executor = nullcontext()
+
+    totals = new_totals()
+    with executor as pool:
+        results = map(analyze_file, filepaths) if pool is None else pool.map(analyze_file, filepaths, chunksize=4)
+        for file_totals, output in results:
+            print(output, end='')
+            merge_file_results(totals, file_totals)
+
+    print_totals(totals)
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("Usage: python discourse_marker_overlap.py <path_to_textgrid_s>")
+        print("Usage: python discourse_marker_overlap.py <path_to_textgrid_s> [jobs]")
         sys.exit(1)
     file_path_or_directory = sys.argv[1]
-    process_files(file_path_or_directory)
\ No newline at end of file
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    process_files(file_path_or_directory, jobs)
\ No newline at end of file
@@ -1,9 +1,5 @@
 import os
-import torchaudio
-import torchaudio.transforms as T
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.ndimage import gaussian_filter1d
 
 def extract_sonority(audio_file_test, n_fft=2048, win_length=1024, hop_length=512, n_mels=20, plot_graphs=True):
     '''
@@ -31,6 +27,11 @@ def extract_sonority(audio_file_test, n_fft=2048, win_length=1024, hop_length=51
     avg_product_time_new : np.ndarray
         The time values corresponding to the `avg_product_new`.
     '''
+    # Heavy dependencies are loaded on first use to keep importing this module cheap
+    import torchaudio
+    import torchaudio.transforms as T
+    from scipy.ndimage import gaussian_filter1d
+
     # Load audio file
     waveform, sample_rate = torchaudio.load(audio_file_test)
 
@@ -81,6 +82,8 @@ def extract_sonority(audio_file_test, n_fft=2048, win_length=1024, hop_length=51
 
     # Plotting helper
     def visualize_results(mel_db, tcssbc, avg_product, sr, hop):
+        import matplotlib.pyplot as plt
+
         num_frames = mel_db.shape[-1]
         times = np.linspace(0, num_frames * hop / sr, num_frames)
         plt.figure(figsize=(12, 6))
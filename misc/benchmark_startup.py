@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the startup time of the command line entry points.
+
+Each script is started with --help, which runs all module-level imports and
+exits right after argument parsing, so the measured time is dominated by
+imports. The bare interpreter startup is measured as a baseline.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_SCRIPTS = [
+    "anonymize_audio.py",
+    "acoustic_measurements.py",
+    "extract_sonority.py",
+    "prosodic_resets.py",
+]
+
+
+def time_command(command, repeats):
+    """Run a command repeatedly and return the wall-clock durations in seconds."""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        durations.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}")
+    return durations
+
+
+def slowest_imports(script, count):
+    """Return the modules with the largest cumulative import time (-X importtime) for a script."""
+    result = subprocess.run([sys.executable, "-X", "importtime", script, "--help"], cwd=REPO_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Only report top-level imports, nested ones are indented and included in their parent's time
+        if not module[1:].startswith(" "):
+            imports.append((int(cumulative), module.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of the command line entry points")
+    parser.add_argument("scripts", nargs="*", default=DEFAULT_SCRIPTS, help="Scripts to benchmark, relative to the repository root")
+    parser.add_argument("--repeats", type=int, default=10, help="Number of runs per script (default: 10)")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Also list the N slowest top-level imports of each script")
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_command([sys.executable, "-c", "pass"], args.repeats))
+    print(f"{'interpreter':<32} median {baseline * 1000:8.1f} ms")
+
+    for script in args.scripts:
+        try:
+            durations = time_command([sys.executable, script, "--help"], args.repeats)
+        except RuntimeError as e:
+            print(f"{script:<32} failed: {e}")
+            continue
+        median = statistics.median(durations)
+        print(f"{script:<32} median {median * 1000:8.1f} ms  min {min(durations) * 1000:8.1f} ms  "
+              f"imports {max(median - baseline, 0) * 1000:8.1f} ms")
+        for cumulative, module in slowest_imports(script, args.importtime):
+            print(f"    {module:<28} {cumulative / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
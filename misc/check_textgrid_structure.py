@@ -1,13 +1,9 @@
 import os
+import sys
 import argparse
-from textgrid import TextGrid
 
-def get_tier_structure(file_path):
-    """
-    Vrne seznam imen vrstic (tiers) iz TextGrid datoteke.
-    """
-    tg = TextGrid.fromFile(file_path)
-    return [tier.name for tier in tg.tiers]
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils_textgrid import scan_tier_inventories
 
 def compare_structures(reference, current):
     """
@@ -27,36 +23,37 @@ def compare_structures(reference, current):
         differences.append("Neskladen vrstni red vrstic")
     return differences
 
-def check_textgrid_structure(directory):
+def check_textgrid_structure(directory, jobs=None):
     """
     Preveri, ali imajo vse TextGrid datoteke v direktoriju enako strukturo.
+    Datoteke se berejo vzporedno v jobs procesih (privzeto toliko, kot je procesorjev).
     """
     structures = {}
     mismatched_files = {}
 
     # Poišči vse TextGrid datoteke v direktoriju
-    for filename in os.listdir(directory):
-        if filename.lower().endswith(".textgrid"):
-            file_path = os.path.join(directory, filename)
+    filenames = [filename for filename in os.listdir(directory) if filename.lower().endswith(".textgrid")]
+    file_paths = [os.path.join(directory, filename) for filename in filenames]
 
-            try:
-                # Pridobi strukturo trenutne datoteke
-                tier_structure = get_tier_structure(file_path)
+    for filename, (file_path, tiers, error) in zip(filenames, scan_tier_inventories(file_paths, jobs)):
+        if error:
+            print(f"Napaka pri obdelavi {file_path}: {error}")
+            continue
 
-                # Shrani strukturo in preveri skladnost
-                if not structures:
-                    # Prva datoteka, nastavimo referenčno strukturo
-                    structures = {"reference": tier_structure, "files": [filename]}
-                else:
-                    if tier_structure != structures["reference"]:
-                        mismatched_files[filename] = compare_structures(
-                            structures["reference"], tier_structure
-                        )
-                    else:
-                        structures["files"].append(filename)
+        # Pridobi strukturo trenutne datoteke
+        tier_structure = [tier["name"] for tier in tiers]
 
-            except Exception as e:
-                print(f"Napaka pri obdelavi {file_path}: {e}")
+        # Shrani strukturo in preveri skladnost
+        if not structures:
+            # Prva datoteka, nastavimo referenčno strukturo
+            structures = {"reference": tier_structure, "files": [filename]}
+        else:
+            if tier_structure != structures["reference"]:
+                mismatched_files[filename] = compare_structures(
+                    structures["reference"], tier_structure
+                )
+            else:
+                structures["files"].append(filename)
 
     # Rezultati
     print("\n--- Preverjanje strukture TextGrid datotek ---")
@@ -79,6 +76,7 @@ def main():
     # Ustvari parser za argumente
     parser = argparse.ArgumentParser(description="Preveri strukturo TextGrid datotek v direktoriju.")
     parser.add_argument("directory", help="Pot do direktorija z TextGrid datotekami.")
+    parser.add_argument("--jobs", type=int, default=None, help="Število vzporednih procesov (privzeto število procesorjev).")
     args = parser.parse_args()
 
     # Preveri, če je podana pot veljaven direktorij
@@ -87,7 +85,7 @@ def main():
         return
 
     # Preveri strukturo TextGrid datotek v direktoriju
-    check_textgrid_structure(args.directory)
+    check_textgrid_structure(args.directory, args.jobs)
 
 if __name__ == "__main__":
     main()
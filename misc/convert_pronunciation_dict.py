@@ -5,6 +5,7 @@ Convert pronunciation dictionary to Montreal Forced Aligner (MFA) format.
 
 import argparse
 import sys
+from collections import Counter
 from pathlib import Path
 
 
@@ -15,6 +16,59 @@ def load_phone_set(phone_set_file):
     return phones
 
 
+class PhoneTrie:
+    """
+    Prefix tree over the phone set used for greedy longest-match tokenization.
+    Built once per run; each lookup walks at most as many characters as the
+    longest phone, so tokenizing an entry is linear in its length.
+    """
+
+    _END = None
+
+    def __init__(self, phone_set):
+        self.root = {}
+        for phone in phone_set:
+            node = self.root
+            for char in phone:
+                node = node.setdefault(char, {})
+            node[self._END] = phone
+
+    def longest_match(self, text, start):
+        """Return the longest phone that starts at text[start], or None."""
+        node = self.root
+        match = None
+        i = start
+        while i < len(text):
+            node = node.get(text[i])
+            if node is None:
+                break
+            i += 1
+            if self._END in node:
+                match = node[self._END]
+        return match
+
+    def tokenize(self, text):
+        """
+        Split text into phones.
+
+        Returns:
+            Tuple (phones, unknown) where unknown is a list of (position, character)
+            pairs for characters that do not start any phone
+        """
+        phones = []
+        unknown = []
+        i = 0
+        while i < len(text):
+            phone = self.longest_match(text, i)
+            if phone is None:
+                unknown.append((i, text[i]))
+                i += 1
+            else:
+                phones.append(phone)
+                i += len(phone)
+        return phones, unknown
+
+
 def parse_pronunciation(pron_string, phone_set, strict=False):
     """
     Parse a pronunciation string into individual phones.
@@ -22,43 +76,24 @@ def parse_pronunciation(pron_string, phone_set, strict=False):
     
     Args:
         pron_string: The pronunciation string to parse
-        phone_set: Set of valid phones
+        phone_set: Set of valid phones or a prebuilt PhoneTrie
         strict: If True, return None when unrecognized characters are found
     
     Returns:
         List of phones, or None if strict=True and unrecognized characters found
     """
-    phones = []
-    i = 0
-    has_errors = False
-    
-    # Convert phone_set to a sorted list (longest first) for better matching
-    sorted_phones = sorted(phone_set, key=len, reverse=True)
-    
-    while i < len(pron_string):
-        matched = False
-        
-        # Try each phone in order (longest first)
-        for phone in sorted_phones:
-            if pron_string[i:].startswith(phone):
-                phones.append(phone)
-                i += len(phone)
-                matched = True
-                break
-        
-        if not matched:
-            has_errors = True
-            # If no match found, skip this character
-            print(f"Warning: Unrecognized character '{pron_string[i]}' at position {i} in pronunciation '{pron_string}'", file=sys.stderr)
-            # Also show what comes next for context
-            context = pron_string[max(0, i-2):min(len(pron_string), i+3)]
-            print(f"  Context: ...{context}...", file=sys.stderr)
-            
-            if strict:
-                return None
-            
-            i += 1
-    
+    phone_trie = phone_set if isinstance(phone_set, PhoneTrie) else PhoneTrie(phone_set)
+    phones, unknown = phone_trie.tokenize(pron_string)
+
+    for i, char in unknown:
+        print(f"Warning: Unrecognized character '{char}' at position {i} in pronunciation '{pron_string}'", file=sys.stderr)
+        # Also show what comes next for context
+        context = pron_string[max(0, i-2):min(len(pron_string), i+3)]
+        print(f"  Context: ...{context}...", file=sys.stderr)
+
+    if unknown and strict:
+        return None
+
     return phones
 
 
@@ -66,6 +101,8 @@ def convert_dictionary(input_file, output_file, phone_set_file, debug=False, str
     """Convert the dictionary from the original format to MFA format."""
     # Load phone set
     phone_set = load_phone_set(phone_set_file)
+    # Build the tokenizer once for the whole dictionary
+    phone_trie = PhoneTrie(phone_set)
     
     if debug:
         print(f"Loaded {len(phone_set)} phones from phone set file", file=sys.stderr)
@@ -76,6 +113,7 @@ def convert_dictionary(input_file, output_file, phone_set_file, debug=False, str
     
     skipped_count = 0
     processed_count = 0
+    unknown_chars = Counter()
     
     with open(input_file, 'r', encoding='utf-8') as infile, \
          open(output_file, 'w', encoding='utf-8') as outfile:
@@ -99,7 +137,7 @@ def convert_dictionary(input_file, output_file, phone_set_file, debug=False, str
             
             for pron in pron_variants:
                 # Parse the pronunciation into individual phones
-                phones = parse_pronunciation(pron, phone_set, strict)
+                phones = parse_pronunciation(pron, phone_trie, strict)
                 
                 if phones:
                     # Write to output file
@@ -107,7 +145,10 @@ def convert_dictionary(input_file, output_file, phone_set_file, debug=False, str
                     processed_count += 1
                 else:
                     if strict:
-                        print(f"Skipped: word '{word}' with pronunciation '{pron}' due to unrecognized characters", file=sys.stderr)
+                        _, unknown = phone_trie.tokenize(pron)
+                        unknown_chars.update(char for _, char in unknown)
+                        chars = ', '.join(f"'{char}'" for char in dict.fromkeys(char for _, char in unknown))
+                        print(f"Skipped: word '{word}' with pronunciation '{pron}' due to unrecognized characters: {chars}", file=sys.stderr)
                         skipped_count += 1
                     else:
                         print(f"Warning: No valid phones found for word '{word}' with pronunciation '{pron}'", file=sys.stderr)
@@ -115,6 +156,8 @@ def convert_dictionary(input_file, output_file, phone_set_file, debug=False, str
     print(f"\nProcessed {processed_count} pronunciation entries", file=sys.stderr)
     if strict and skipped_count > 0:
         print(f"Skipped {skipped_count} entries due to unrecognized characters", file=sys.stderr)
+        for char, count in unknown_chars.most_common():
+            print(f"  '{char}' (U+{ord(char):04X}): {count} occurrences", file=sys.stderr)
 
 
 def main():
@@ -1,9 +1,82 @@
 #!/usr/bin/env python3
 import xml.etree.ElementTree as ET
-import re
 import argparse
+import os
 import sys
 import json
+from bisect import bisect_left, bisect_right
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils_textgrid import iter_tier_intervals
+
+# Slack added to time windows looked up in an IntervalIndex, so that the exact
+# tolerance checks decide borderline cases despite floating-point rounding
+INDEX_EPSILON = 1e-9
+
+def comparison_text(text):
+    """Lowercased part of an interval text after the first dot ('' if there is no dot)"""
+    parts = text.lower().strip().split('.', 1)
+    return parts[1].strip() if len(parts) > 1 else ""
+
+def text_similarity(text1, text2):
+    """
+    Similarity of the parts of two interval texts after the first dot
+
+    Counts the characters of the first text that occur in the second one; a set
+    of the second text's characters keeps this linear in the text lengths.
+    """
+    text1_compare = comparison_text(text1)
+    text2_compare = comparison_text(text2)
+
+    # If both strings are empty after processing, consider them matching
+    if not text1_compare and not text2_compare:
+        return 1.0
+    # If one string is empty after processing, consider them non-matching
+    if not text1_compare or not text2_compare:
+        return 0.0
+
+    text2_chars = set(text2_compare)
+    common = sum(1 for c in text1_compare if c in text2_chars)
+    return 2 * common / (len(text1_compare) + len(text2_compare))
+
+def midpoint(interval):
+    return (interval['start'] + interval['end']) / 2
+
+class IntervalIndex:
+    """Intervals sorted by start time and by midpoint, for time-window and closest-interval queries"""
+
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.by_start = sorted(range(len(intervals)), key=lambda i: intervals[i]['start'])
+        self.starts = [intervals[i]['start'] for i in self.by_start]
+        self.by_midpoint = sorted(range(len(intervals)), key=lambda i: midpoint(intervals[i]))
+        self.midpoints = [midpoint(intervals[i]) for i in self.by_midpoint]
+
+    def starting_between(self, low, high):
+        """Positions (in list order) of the intervals starting within [low, high]"""
+        first = bisect_left(self.starts, low - INDEX_EPSILON)
+        last = bisect_right(self.starts, high + INDEX_EPSILON)
+        return sorted(self.by_start[first:last])
+
+    def closest(self, target_interval):
+        """Interval with the closest midpoint; ties go to the first interval in list order"""
+        if not self.intervals:
+            return None
+        target_mid = midpoint(target_interval)
+        pos = bisect_left(self.midpoints, target_mid)
+        best = min(abs(self.midpoints[k] - target_mid) for k in (pos - 1, pos) if 0 <= k < len(self.midpoints))
+
+        # Collect all intervals at the best distance, which are adjacent in midpoint order
+        candidates = []
+        k = pos - 1
+        while k >= 0 and abs(self.midpoints[k] - target_mid) <= best:
+            candidates.append(self.by_midpoint[k])
+            k -= 1
+        k = pos
+        while k < len(self.midpoints) and abs(self.midpoints[k] - target_mid) <= best:
+            candidates.append(self.by_midpoint[k])
+            k += 1
+        return self.intervals[min(candidates)]
 
 class IntervalComparator:
     def __init__(self):
@@ -18,52 +91,22 @@ class IntervalComparator:
             textgrid_path (str): Path to TextGrid file
             tier_name (str): Name of the tier to extract intervals from
         """
-        # Try different encodings
-        encodings = ['utf-16', 'utf-8', 'utf-16le', 'utf-16be', 'latin1']
-        content = None
-        
-        for encoding in encodings:
-            try:
-                with open(textgrid_path, 'r', encoding=encoding) as f:
-                    content = f.read()
-                break
-            except UnicodeError:
-                continue
-            except FileNotFoundError:
-                print(f"Error: TextGrid file '{textgrid_path}' not found")
-                sys.exit(1)
-            except Exception as e:
-                print(f"Error reading TextGrid file: {str(e)}")
-                sys.exit(1)
-                
-        if content is None:
-            print(f"Error: Could not read TextGrid file with any known encoding")
+        try:
+            for start_time, end_time, text in iter_tier_intervals(textgrid_path, tier_name):
+                self.textgrid_intervals.append({
+                    'start': start_time,
+                    'end': end_time,
+                    'text': text
+                })
+        except FileNotFoundError:
+            print(f"Error: TextGrid file '{textgrid_path}' not found")
             sys.exit(1)
-        
-        # Find the specified tier
-        # TextGrid format can have varying whitespace, handle it more flexibly
-        tier_pattern = fr'item\s*\[\d+\]:\s*class\s*=\s*"IntervalTier"\s*name\s*=\s*"{tier_name}".*?intervals:\s*size\s*='
-        tier_match = re.search(tier_pattern, content, re.DOTALL)
-        
-        if not tier_match:
-            print(f"Error: Tier '{tier_name}' not found in TextGrid file")
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"Error reading TextGrid file: {str(e)}")
             sys.exit(1)
-        
-        # Extract intervals from the tier
-        tier_content = content[tier_match.start():]
-        interval_pattern = r'intervals\s*\[\d+\]:\s*xmin\s*=\s*([\d.]+)\s*xmax\s*=\s*([\d.]+)\s*text\s*=\s*"(.*?)"'
-        intervals = re.finditer(interval_pattern, tier_content)
-        
-        for interval in intervals:
-            start_time = float(interval.group(1))
-            end_time = float(interval.group(2))
-            text = interval.group(3)
-            
-            self.textgrid_intervals.append({
-                'start': start_time,
-                'end': end_time,
-                'text': text
-            })
     
     def parse_exb(self, exb_path, category_id):
         """
@@ -117,20 +160,6 @@ class IntervalComparator:
                     print(f"Error: Missing timeline entry for event {start_id}-{end_id} in tier {tier_id}")
                     sys.exit(1)
     
-    def find_closest_interval(self, target_interval, candidate_intervals):
-        """Find the closest interval in time from a list of candidates"""
-        if not candidate_intervals:
-            return None
-            
-        # Calculate midpoint of target interval
-        target_mid = (target_interval['start'] + target_interval['end']) / 2
-        
-        # Find closest interval based on midpoint distance
-        closest = min(candidate_intervals, 
-                     key=lambda x: abs((x['start'] + x['end'])/2 - target_mid))
-        
-        return closest
-    
     def compare_intervals(self, time_tolerance=0.1, text_match_threshold=0.8):
         """
         Compare intervals between TextGrid and EXB files
@@ -145,37 +174,18 @@ class IntervalComparator:
         matches = []
         textgrid_unmatched = []
         exb_unmatched = []
-        
-        # Helper function to calculate text similarity
-        def text_similarity(text1, text2):
-            # Extract parts after the first dot
-            text1 = text1.lower().strip()
-            text2 = text2.lower().strip()
-            
-            # Split by first dot and take the rest, if no dot present use the whole string
-            text1_parts = text1.split('.', 1)
-            text2_parts = text2.split('.', 1)
-            
-            # Get the parts after the dot, or empty string if no dot
-            text1_compare = text1_parts[1].strip() if len(text1_parts) > 1 else ""
-            text2_compare = text2_parts[1].strip() if len(text2_parts) > 1 else ""
-            
-            # If both strings are empty after processing, consider them matching
-            if not text1_compare and not text2_compare:
-                return 1.0
-            # If one string is empty after processing, consider them non-matching
-            if not text1_compare or not text2_compare:
-                return 0.0
-                
-            # Calculate similarity on the parts after the dot
-            common = sum(1 for c in text1_compare if c in text2_compare)
-            return 2 * common / (len(text1_compare) + len(text2_compare))
+
+        # Only EXB intervals starting within the tolerance are candidates, looked up in a sorted index
+        exb_index = IntervalIndex(self.exb_intervals)
+        textgrid_index = IntervalIndex(self.textgrid_intervals)
         
         # Compare each TextGrid interval with EXB intervals
         for tg_interval in self.textgrid_intervals:
             found_match = False
+            candidates = exb_index.starting_between(tg_interval['start'] - time_tolerance,
+                                                    tg_interval['start'] + time_tolerance)
             
-            for exb_interval in self.exb_intervals:
+            for exb_interval in (self.exb_intervals[i] for i in candidates):
                 # Check time boundaries
                 start_diff = abs(tg_interval['start'] - exb_interval['start'])
                 end_diff = abs(tg_interval['end'] - exb_interval['end'])
@@ -203,12 +213,10 @@ class IntervalComparator:
         
         # Find closest intervals for unmatched entries
         for interval in textgrid_unmatched:
-            closest = self.find_closest_interval(interval, self.exb_intervals)
-            interval['closest_match'] = closest
+            interval['closest_match'] = exb_index.closest(interval)
 
         for interval in exb_unmatched:
-            closest = self.find_closest_interval(interval, self.textgrid_intervals)
-            interval['closest_match'] = closest
+            interval['closest_match'] = textgrid_index.closest(interval)
         
         return {
             'matches': matches,
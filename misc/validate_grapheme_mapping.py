@@ -4,6 +4,9 @@ from textgrid import TextGrid
 import difflib
 from collections import defaultdict
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import assign_intervals_to_words
+
 def validate_grapheme_mapping(input_textgrid, verbose=False):
     """
     Validates the phoneme-to-grapheme mapping by checking if the mapped graphemes 
@@ -47,33 +50,25 @@ def validate_grapheme_mapping(input_textgrid, verbose=False):
     match_examples = []
     fail_examples = []
     
+    # Assign graphemes and phones to words in a single sweep over each tier
+    word_intervals = [interval for interval in word_tier if interval.mark.strip()]
+    word_spans = [(interval.minTime, interval.maxTime) for interval in word_intervals]
+    grapheme_intervals = list(grapheme_tier)
+    phone_intervals = list(phone_tier)
+    grapheme_indices = assign_intervals_to_words(
+        word_spans, [(interval.minTime, interval.maxTime) for interval in grapheme_intervals])
+    phone_indices = assign_intervals_to_words(
+        word_spans, [(interval.minTime, interval.maxTime) for interval in phone_intervals])
+    
     # Process each word
-    for word_interval in word_tier:
+    for word_interval, word_grapheme_indices, word_phone_indices in zip(word_intervals, grapheme_indices, phone_indices):
         original_word = word_interval.mark.strip().lower()
         
-        # Skip empty intervals
-        if not original_word:
-            continue
-        
         total_words += 1
         
-        # Find all grapheme intervals within this word's time span
-        word_graphemes = []
-        for grapheme_interval in grapheme_tier:
-            # Check if the grapheme interval is within the word interval
-            if (grapheme_interval.minTime >= word_interval.minTime and 
-                grapheme_interval.maxTime <= word_interval.maxTime):
-                if grapheme_interval.mark:  # Only include non-empty graphemes
-                    word_graphemes.append(grapheme_interval.mark)
-        
-        # Find all phone intervals within this word's time span
-        word_phones = []
-        for phone_interval in phone_tier:
-            # Check if the phone interval is within the word interval
-            if (phone_interval.minTime >= word_interval.minTime and 
-                phone_interval.maxTime <= word_interval.maxTime):
-                if phone_interval.mark:  # Only include non-empty phones
-                    word_phones.append(phone_interval.mark)
+        # Grapheme and phone intervals within this word's time span, only non-empty ones
+        word_graphemes = [grapheme_intervals[i].mark for i in word_grapheme_indices if grapheme_intervals[i].mark]
+        word_phones = [phone_intervals[i].mark for i in word_phone_indices if phone_intervals[i].mark]
         
         # Reconstruct the word from graphemes
         reconstructed_word = ''.join(word_graphemes).lower()
@@ -3,35 +3,38 @@ import os
 import glob
 import csv
 from textgrid import TextGrid
+from utils import windows_containing_points
 
 # Function to load a TextGrid file
 def load_textgrid(filepath):
     return TextGrid.fromFile(filepath)
 
-# Function to check overlaps between intervals
-def interval_overlap(interval1, interval2):
-    return (interval1.minTime <= interval2.minTime <= interval1.maxTime) or \
-           (interval1.minTime <= interval2.maxTime <= interval1.maxTime)
-
 # Function to analyze overlaps
 def analyze_overlaps(textgrid, pos_tiers_indices, pu_tier_name):
     results = {}
     pu_tier = textgrid.getFirst(pu_tier_name)
-    
+
+    # A POS interval overlaps a PU interval when a PU boundary lies within it
+    pu_boundaries = [interval.minTime for interval in pu_tier] + [interval.maxTime for interval in pu_tier]
+
+    # Collect the POS intervals of all tiers and sweep them against the PU boundaries at once
+    tier_names, windows, owners = [], [], []
     for tier_index in pos_tiers_indices:
         tier = textgrid[tier_index]
+        tier_names.append(tier.name)
         pos_intervals = [interval for interval in tier if "POS" in interval.mark]
-        total_pos_count = len(pos_intervals)
-        match_count = 0
-        
-        for pos_interval in pos_intervals:
-            overlap_found = any(interval_overlap(pos_interval, pu_interval) for pu_interval in pu_tier)
-            if overlap_found:
-                match_count += 1
-        
-        # Only record the match ratio
-        match_ratio = f"{match_count}/{total_pos_count}" if total_pos_count > 0 else "0/0"
-        results[tier.name] = (match_count, total_pos_count)
+        windows += [(interval.minTime, interval.maxTime) for interval in pos_intervals]
+        owners += [len(tier_names) - 1] * len(pos_intervals)
+
+    match_counts = [0] * len(tier_names)
+    total_pos_counts = [0] * len(tier_names)
+    for owner, overlap_found in zip(owners, windows_containing_points(windows, pu_boundaries)):
+        total_pos_counts[owner] += 1
+        if overlap_found:
+            match_counts[owner] += 1
+
+    for name, match_count, total_pos_count in zip(tier_names, match_counts, total_pos_counts):
+        results[name] = (match_count, total_pos_count)
     
     return results
 
@@ -0,0 +1,150 @@
+import argparse
+import parselmouth
+import numpy as np
+from textgrid import TextGrid, IntervalTier, Interval
+from utils_acoustic import masked_interval_means, syllable_pitch_statistics, track_frame_indices
+
+# Neighbourhood sizes (syllables on each side) of the methods used by the single-tier scripts
+WINDOWS = {"near": 1, "extended": 2}
+
+# Default thresholds, shared by detect_prosodic_resets, main and the command line
+PITCH_RESET_THRESHOLD = 40  # Hz
+INTENSITY_RESET_THRESHOLD = 7  # dB
+REDUCTION_THRESHOLD = 1.5  # syllable length ratio
+SILENCE_THRESHOLD = 50  # dB
+
+
+def neighbour_reference(values, window, require_full=False, fallback=None):
+    """
+    Mean of up to ``window`` neighbours on each side of every element, excluding the element itself.
+
+    Neighbour sums and counts are obtained by convolution, so any window size costs the same.
+    Elements with no neighbours (or, if ``require_full``, with fewer than ``2 * window``)
+    get ``fallback`` (the element's own value when None).
+    """
+    values = np.asarray(values, dtype=float)
+    kernel = np.ones(2 * window + 1)
+    kernel[window] = 0
+    sums = np.convolve(values, kernel)[window:window + len(values)]
+    counts = np.convolve(np.ones(len(values)), kernel)[window:window + len(values)]
+    valid = counts == 2 * window if require_full else counts > 0
+    reference = values.copy() if fallback is None else np.full(len(values), float(fallback))
+    reference[valid] = sums[valid] / counts[valid]
+    return reference
+
+
+def detect_prosodic_resets(syllable_intervals, pitch, intensity, pitch_reset_threshold=PITCH_RESET_THRESHOLD,
+                           intensity_reset_threshold=INTENSITY_RESET_THRESHOLD, reduction_threshold=REDUCTION_THRESHOLD,
+                           pitch_method="average-neighboring", pitch_window=1, intensity_window=1, rate_window=1,
+                           silence_threshold=SILENCE_THRESHOLD):
+    """
+    Label pitch resets, intensity resets and speech rate reduction for all syllables in one pass.
+
+    Parameters:
+    - syllable_intervals: List of (start, end, label) tuples of non-empty syllables.
+    - pitch: Praat Pitch object (0 Hz for unvoiced frames).
+    - intensity: Praat Intensity object (dB).
+    - pitch_method: "average-neighboring" or "intrasyllabic".
+    - pitch_window, intensity_window, rate_window: Number of neighbouring syllables on each side.
+
+    Returns:
+    - Dictionary mapping tier names ("pitch-reset", "intensity-reset", "speech-rate-reduction")
+      to lists of (start, end, label) tuples.
+    """
+    if not syllable_intervals:
+        return {"pitch-reset": [], "intensity-reset": [], "speech-rate-reduction": []}
+
+    starts = np.array([t[0] for t in syllable_intervals], dtype=float)
+    ends = np.array([t[1] for t in syllable_intervals], dtype=float)
+    pitch_values = np.asarray(pitch.selected_array['frequency'], dtype=float)
+    intensity_values = np.asarray(intensity.values[0], dtype=float)
+
+    # Pitch reset
+    pitch_start, pitch_end = track_frame_indices(pitch, starts, ends)
+    pitch_stats = syllable_pitch_statistics(pitch_values, pitch_start, pitch_end)
+    if pitch_method == "average-neighboring":
+        pitch_reference = neighbour_reference(pitch_stats["mean"], pitch_window, require_full=True)
+        pitch_reset = np.abs(pitch_stats["mean"] - pitch_reference) >= pitch_reset_threshold
+    elif pitch_method == "intrasyllabic":
+        pitch_reset = (pitch_stats["voiced_count"] > 1) & (pitch_stats["semitone_range"] >= 4)
+    else:
+        raise ValueError(f"Unknown pitch reset method: {pitch_method}")
+
+    # Intensity reset
+    intensity_start, intensity_end = track_frame_indices(intensity, starts, ends)
+    intensity_means, _ = masked_interval_means(intensity_values, intensity_start, intensity_end,
+                                               intensity_values > silence_threshold)
+    intensity_reference = neighbour_reference(intensity_means, intensity_window)
+    intensity_reset = np.abs(intensity_means - intensity_reference) >= intensity_reset_threshold
+
+    # Speech rate reduction
+    lengths = ends - starts
+    average_neighbor_length = neighbour_reference(lengths, rate_window, fallback=0)
+    rate_reduction = lengths > average_neighbor_length * reduction_threshold
+
+    def to_tier(flags):
+        return [(start, end, "POS" if flag else "NEG") for (start, end, _), flag in zip(syllable_intervals, flags)]
+
+    return {
+        "pitch-reset": to_tier(pitch_reset),
+        "intensity-reset": to_tier(intensity_reset),
+        "speech-rate-reduction": to_tier(rate_reduction),
+    }
+
+
+def main(audio_path, input_textgrid, output_textgrid, pitch_reset_threshold=PITCH_RESET_THRESHOLD,
+         intensity_reset_threshold=INTENSITY_RESET_THRESHOLD, reduction_threshold=REDUCTION_THRESHOLD,
+         pitch_method="average-neighboring", pitch_window=1, intensity_window=1, rate_window=1,
+         silence_threshold=SILENCE_THRESHOLD):
+    # Load the audio and the TextGrid
+    sound = parselmouth.Sound(audio_path)
+    tg = TextGrid.fromFile(input_textgrid)
+
+    # Analyze pitch and intensity once for all three tiers
+    pitch = sound.to_pitch()
+    intensity = sound.to_intensity()
+
+    # Get the syllable tier
+    syllable_intervals = tg.getFirst("cnvrstl-syllables")
+    syllable_intervals = [(interval.minTime, interval.maxTime, interval.mark) for interval in syllable_intervals]
+    # Remove empty intervals
+    syllable_intervals = [t for t in syllable_intervals if t[-1] != '']
+
+    tiers = detect_prosodic_resets(
+        syllable_intervals, pitch, intensity, pitch_reset_threshold, intensity_reset_threshold, reduction_threshold,
+        pitch_method, pitch_window, intensity_window, rate_window, silence_threshold)
+
+    for name, intervals in tiers.items():
+        # If the tier exists, overwrite it, otherwise create a new one
+        existing_tier = next((tier for tier in tg.tiers if tier.name == name), None)
+        if existing_tier:
+            existing_tier.intervals = []
+            tier = existing_tier
+        else:
+            tier = IntervalTier(name=name, minTime=min(t[0] for t in intervals), maxTime=max(t[1] for t in intervals))
+            tg.append(tier)
+        for start, end, label in intervals:
+            tier.addInterval(Interval(start, end, label))
+
+    # Save the modified TextGrid
+    tg.write(output_textgrid)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add pitch-reset, intensity-reset and speech-rate-reduction tiers in one pass.")
+    parser.add_argument("input_wav", help="Input WAV file")
+    parser.add_argument("input_textgrid", help="Input TextGrid file with a 'cnvrstl-syllables' tier")
+    parser.add_argument("output_textgrid", help="Output TextGrid file")
+    parser.add_argument("--pitch_reset_threshold", type=float, default=PITCH_RESET_THRESHOLD, help="Pitch reset threshold in Hz (average-neighboring method)")
+    parser.add_argument("--intensity_reset_threshold", type=float, default=INTENSITY_RESET_THRESHOLD, help="Intensity reset threshold in dB")
+    parser.add_argument("--reduction_threshold", type=float, default=REDUCTION_THRESHOLD, help="Syllable length ratio for speech rate reduction")
+    parser.add_argument("--pitch_method", choices=["average-neighboring", "intrasyllabic"], default="average-neighboring", help="Pitch reset method")
+    parser.add_argument("--pitch_window", type=int, default=WINDOWS["near"], help="Neighbouring syllables on each side for pitch reset")
+    parser.add_argument("--intensity_window", type=int, default=WINDOWS["near"], help="Neighbouring syllables on each side for intensity reset (near=1, extended=2)")
+    parser.add_argument("--rate_window", type=int, default=WINDOWS["near"], help="Neighbouring syllables on each side for speech rate reduction (near=1, extended=2)")
+    parser.add_argument("--silence_threshold", type=float, default=SILENCE_THRESHOLD, help="Intensity frames at or below this value (dB) are ignored")
+    args = parser.parse_args()
+
+    main(args.input_wav, args.input_textgrid, args.output_textgrid, args.pitch_reset_threshold,
+         args.intensity_reset_threshold, args.reduction_threshold, args.pitch_method, args.pitch_window,
+         args.intensity_window, args.rate_window, args.silence_threshold)
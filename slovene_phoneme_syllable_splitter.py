@@ -1,48 +1,65 @@
+from functools import lru_cache
+
+
 def is_vowel(list_of_phonemes_in_word, position, vowels):
     """Function to determine whether a phoneme is a vowel"""
     return list_of_phonemes_in_word[position] in vowels
 
 
+# Phoneme classes per pronunciation dictionary, built once at import time
+VOWEL_PHONEMES = {
+    'gos': frozenset(["@", "a", "e", "E", "i", "o", "O", "u"]),
+    'optilex': frozenset(["a", "\"a", "\"a:", "e", "\"e:", "E", "\"E", "\"E:", "@", "\"@", "i", "\"i", "\"i:", "I", "o", "\"o:", "O", "\"O", "\"O:", "u", "\"u", "\"u:"]),
+}
+SONORANT_PHONEMES = {
+    'gos': frozenset(["m", "n", "n'", "N", "v", "w", "W", "l", "l'", "r", "j"]),
+    'optilex': frozenset(["m", "n", "n'", "N", "v", "w", "W", "U", "l", "l'", "r", "j"]),
+}
+VOICED_OBSTRUENT_PHONEMES = {
+    'gos': frozenset(["b", "d", "z", "Z", "g"]),
+    'optilex': frozenset(["b", "b_n", "b_f", "d", "d_l", "d_n", "z", "Z", "g"]),
+}
+VOICELESS_OBSTRUENT_PHONEMES = {
+    'gos': frozenset(["F", "p", "t", "s", "S", "tS", "k", "f", "h", "x", "ts"]),
+    'optilex': frozenset(["F", "p", "p_n", "p_f", "t", "t_l", "t_n", "s", "S", "tS", "k", "f", "G", "x", "ts"]),
+}
+CONSONANT_PHONEMES = {
+    pdict: SONORANT_PHONEMES[pdict] | VOICED_OBSTRUENT_PHONEMES[pdict] | VOICELESS_OBSTRUENT_PHONEMES[pdict]
+    for pdict in ('gos', 'optilex')
+}
+
+# Maximum number of distinct pronunciations kept by syllabize_phonemes
+SYLLABIZE_CACHE_SIZE = 65536
+
+
+def _pdict_key(pdict):
+    """Map a dictionary name to a phoneme class table key (anything but Gos is Optilex)."""
+    return 'gos' if pdict.lower() == 'gos' else 'optilex'
+
+
 def get_vowel_phonemes(pdict):
-    """Returns a list of vowel phonemes."""
-    if pdict.lower() == 'gos':
-        return ["@", "a", "e", "E", "i", "o", "O", "u"] #Gos
-    else:
-        return ["a", "\"a", "\"a:", "e", "\"e:", "E", "\"E", "\"E:", "@", "\"@", "i", "\"i", "\"i:", "I", "o", "\"o:", "O", "\"O", "\"O:", "u", "\"u", "\"u:"] #Optilex
+    """Returns a set of vowel phonemes."""
+    return VOWEL_PHONEMES[_pdict_key(pdict)]
 
 
 def get_sonorant_phonemes(pdict):
-    """Returns a list of sonorant phonemes. """
-    if pdict.lower() == 'gos':
-        return ["m", "n", "n'", "N", "v", "w", "W", "l", "l'", "r", "j"] #Gos
-    else:
-        return ["m", "n", "n'", "N", "v", "w", "W", "U", "l", "l'", "r", "j"] #Optilex
+    """Returns a set of sonorant phonemes. """
+    return SONORANT_PHONEMES[_pdict_key(pdict)]
 
 
 def get_voiced_obstruent_phonemes(pdict):
-    """Returns a list of voiced obstruent phonemes."""
-    if pdict.lower() == 'gos':
-        return ["b", "d", "z", "Z", "g"] #Gos
-    else:
-        return ["b", "b_n", "b_f", "d", "d_l", "d_n", "z", "Z", "g"] #Optilex
+    """Returns a set of voiced obstruent phonemes."""
+    return VOICED_OBSTRUENT_PHONEMES[_pdict_key(pdict)]
 
 
 def get_voiceless_obstruent_phonemes(pdict):
-    """Returns a list of voiceless obstruent phonemes."""
-    if pdict.lower() == 'gos':
-        return ["F", "p", "t", "s", "S", "tS", "k", "f", "h", "x", "ts"] #Gos
-    else:
-        return ["F", "p", "p_n", "p_f", "t", "t_l", "t_n", "s", "S", "tS", "k", "f", "G", "x", "ts"] #Optilex
+    """Returns a set of voiceless obstruent phonemes."""
+    return VOICELESS_OBSTRUENT_PHONEMES[_pdict_key(pdict)]
 
 
 def get_consonant_phonemes(pdict):
-    """Returns a list of all consonant phonemes."""
-    if pdict.lower() == 'gos':
-        return ["m", "n", "n'", "N", "v", "w", "W", "l", "l'", "r", "j", "b", "d",
-                "z", "Z", "g", "p", "t", "s", "S", "tS", "k", "f", "F", "h", "x", "ts"] #Gos
-    else:
-        return ["m", "n", "n'", "N", "v", "w", "W", "U", "l", "l'", "r", "j", "b", "b_n", "b_f", "d", "d_l", "d_n",
-                "z", "Z", "g", "p", "p_n", "p_f", "t", "t_l", "t_n", "s", "S", "tS", "k", "f", "F", "G", "x", "ts"] #Optilex
+    """Returns a set of all consonant phonemes."""
+    return CONSONANT_PHONEMES[_pdict_key(pdict)]
 
 
 def split_consonant_phonemes_between_syllables(consonants, pdict):
@@ -107,7 +124,12 @@ def split_consonant_phonemes_between_syllables(consonants, pdict):
 
 
 def syllabize_phonemes(word: str) -> list[str]:
-    """A function that splits a word into syllables."""
+    """A function that splits a word into syllables. Results are memoized per phoneme string."""
+    return list(_syllabize_phonemes_cached(word))
+
+
+@lru_cache(maxsize=SYLLABIZE_CACHE_SIZE)
+def _syllabize_phonemes_cached(word: str) -> tuple[str, ...]:
     consonants = []
     syllables = []
     pdict = 'optilex'
@@ -129,9 +151,19 @@ def syllabize_phonemes(word: str) -> list[str]:
             consonants.append(phonemes_in_word[i])
 
     if len(syllables) < 1:
-        return [word]
+        return (word,)
 
     if consonants:
         syllables[-1] += " " + " ".join(consonants)
 
-    return syllables
+    return tuple(syllables)
+
+
+def syllabize_cache_info():
+    """Returns hit/miss statistics of the syllabize_phonemes cache."""
+    return _syllabize_phonemes_cached.cache_info()
+
+
+def syllabize_cache_clear():
+    """Empties the syllabize_phonemes cache."""
+    _syllabize_phonemes_cached.cache_clear()
@@ -1,15 +1,41 @@
+from functools import lru_cache
+
+
+# Grapheme classes, built once at import time
+ACCENTED_GRAPHEMES = frozenset(["á", "à", "Á", "À", "è", "é", "ê", "É", "È", "Ê",
+                                "í", "ì", "Ì", "Í", "ó", "ò", "ô",
+                                "Ó", "Ò", "Ô", "ù", "ú", "Ù", "Ú",
+                                "ŕ", "Ŕ"])
+VOWEL_GRAPHEMES = frozenset(['à', 'á', 'é', 'è', 'ê', 'ì', 'í', 'î', 'ó', 'ô', 'ò', 'ú', 'a', 'e', 'i', 'o', 'u', 'ŕ',
+                             'Á', 'É', 'Í', 'Ó', 'Ú', 'Ŕ', 'À', 'È', 'Ì', 'Ò', 'Ù', 'Ê', 'Ô', 'A', 'E', 'I', 'O', 'U'])
+SONORANT_GRAPHEMES = frozenset(['m', 'n', 'v', 'l', 'r', 'j', 'M', 'N', 'V', 'L', 'R', 'J'])
+VOICED_OBSTRUENT_GRAPHEMES = frozenset(['b', 'd', 'z', 'ž', 'g', 'B', 'D', 'Z', 'Ž', 'G'])
+VOICELESS_OBSTRUENT_GRAPHEMES = frozenset(['p', 't', 's', 'š', 'č', 'k', 'f', 'h', 'c',
+                                           'P', 'T', 'S', 'Š', 'Č', 'K', 'F', 'H', 'C'])
+CONSONANT_GRAPHEMES = SONORANT_GRAPHEMES | VOICED_OBSTRUENT_GRAPHEMES | VOICELESS_OBSTRUENT_GRAPHEMES
+
+# Class codes used by the translation table below
+VOWEL, SONORANT, VOICED_OBSTRUENT, VOICELESS_OBSTRUENT = 'V', 'S', 'D', 'T'
+
+# str.translate table mapping every known grapheme to its class code
+GRAPHEME_CLASS_TABLE = str.maketrans(
+    {**{g: VOWEL for g in VOWEL_GRAPHEMES},
+     **{g: SONORANT for g in SONORANT_GRAPHEMES},
+     **{g: VOICED_OBSTRUENT for g in VOICED_OBSTRUENT_GRAPHEMES},
+     **{g: VOICELESS_OBSTRUENT for g in VOICELESS_OBSTRUENT_GRAPHEMES}})
+
+# Maximum number of distinct words kept in the syllabification cache
+SYLLABIZE_CACHE_SIZE = 65536
+
+
+def classify_graphemes(word):
+    """Returns a string of class codes (V, S, D, T) for the graphemes of a word. Unknown characters are kept as-is."""
+    return word.translate(GRAPHEME_CLASS_TABLE)
+
+
 def is_syllable_accented(syllable):
     """Function to determine if syllable is accentuated"""
-    # accented_graphemes = [u'ŕ', u'á', u'ä', u'é', u'ë', u'ě', u'í', u'î', u'ó', u'ô', u'ö', u'ú', u'ü']
-    #accented_graphemes = [u'ŕ', u'á', u'à', u'é', u'è', u'ê', u'í', u'ì', u'ó', u'ô', u'ò', u'ú', u'ù']
-    accented_graphemes = ["á", "à", "Á", "À", "è", "é", "ê", "É", "È", "Ê",
-                "í",  "ì", "Ì", "Í", "ó", "ò", "ô",
-                "Ó", "Ò", "Ô", "ù", "ú", "Ù", "Ú",
-                "ŕ", "Ŕ"]
-    for grapheme in syllable:
-        if grapheme in accented_graphemes:
-            return True
-    return False
+    return not ACCENTED_GRAPHEMES.isdisjoint(syllable)
 
 
 def is_vowel(list_of_characters_in_word, position, vowels):
@@ -25,40 +51,32 @@ def is_vowel(list_of_characters_in_word, position, vowels):
 
 
 def get_vowel_graphemes():
-    """Returns a list of vowel graphemes. This includes the accented 'r' grapheme."""
-    return ['à', 'á', 'é', 'è', 'ê', 'ì', 'í', 'î', 'ó', 'ô', 'ò', 'ú', 'a', 'e', 'i', 'o', 'u', 'ŕ',
-            'Á', 'É', 'Í', 'Ó', 'Ú', 'Ŕ', 'À', 'È', 'Ì', 'Ò', 'Ù', 'Ê', 'Ô', 'A', 'E', 'I', 'O', 'U']
-
+    """Returns a set of vowel graphemes. This includes the accented 'r' grapheme."""
+    return VOWEL_GRAPHEMES
 
 
 def get_sonorant_graphemes():
-    """Returns a list of sonorant graphemes. """
-    return ['m', 'n', 'v', 'l', 'r', 'j', 'M', 'N', 'V', 'L', 'R', 'J']
+    """Returns a set of sonorant graphemes. """
+    return SONORANT_GRAPHEMES
 
 
 def get_voiced_obstruent_graphemes():
-    """Returns a list of voiced obstruent graphemes."""
-    return ['b', 'd', 'z', 'ž', 'g', 'B', 'D', 'Z', 'Ž', 'G']
+    """Returns a set of voiced obstruent graphemes."""
+    return VOICED_OBSTRUENT_GRAPHEMES
 
 
 def get_voiceless_obstruent_graphemes():
-    """Returns a list of voiceless obstruent graphemes."""
-    return ['p', 't', 's', 'š', 'č', 'k', 'f', 'h', 'c', 'P', 'T', 'S', 'Š', 'Č', 'K', 'F', 'H', 'C']
+    """Returns a set of voiceless obstruent graphemes."""
+    return VOICELESS_OBSTRUENT_GRAPHEMES
 
 
 def get_consonant_graphemes():
-    """Returns a list of all consonant graphemes."""
-    return ['m', 'n', 'v', 'l', 'r', 'j', 'b', 'd', 'z', 'ž', 'g', 'p', 't', 's', 'š', 'č', 'k', 'f', 'h', 'c',
-            'M', 'N', 'V', 'L', 'R', 'J', 'B', 'D', 'Z', 'Ž', 'G', 'P', 'T', 'S', 'Š', 'Č', 'K', 'F', 'H', 'C']
+    """Returns a set of all consonant graphemes."""
+    return CONSONANT_GRAPHEMES
 
 
 def split_consonant_graphemes_between_syllables(consonants):
     """A function that splits consonants between syllable 1 and syllable 2."""
-    # GET LISTS OF GRAPHEMES BY CATEGORY
-    sonorant_graphemes = get_sonorant_graphemes()
-    voiced_obstruent_graphemes = get_voiced_obstruent_graphemes()
-    voiceless_obstruent_graphemes = get_voiceless_obstruent_graphemes()
-
     # If there are no consonant graphemes, return empty lists for syllable 1 and syllable 2
     if len(consonants) == 0:
         return [''], ['']
@@ -70,40 +88,43 @@ def split_consonant_graphemes_between_syllables(consonants):
     # If there are more consonant graphemes, perform the following:
     else:
         split_options = []
+        classes = classify_graphemes(''.join(consonants))
         for i in range(len(consonants)-1):
             current_consonant_grapheme = consonants[i]
             next_consonant_grapheme = consonants[i+1]
+            current_class = classes[i]
+            next_class = classes[i+1]
 
-            if current_consonant_grapheme in ['-', '_']:
+            if current_consonant_grapheme in ('-', '_'):
                 split_options.append([i, -1])
             # If the consonants are the same (oDDaja)
             elif current_consonant_grapheme == next_consonant_grapheme:
                 split_options.append([i, 0])
             # Combination of sonorant + obstruent grapheme (objeM-Ka, soN-Da)
-            elif current_consonant_grapheme in sonorant_graphemes:
-                if next_consonant_grapheme in voiced_obstruent_graphemes or next_consonant_grapheme in voiceless_obstruent_graphemes:
+            elif current_class == SONORANT:
+                if next_class == VOICED_OBSTRUENT or next_class == VOICELESS_OBSTRUENT:
                     split_options.append([i, 2])
                 # TODO - ADD SONORANT + SONORANT (orvejski? Narvik - narviški?)
-                elif next_consonant_grapheme in sonorant_graphemes:
+                elif next_class == SONORANT:
                     split_options.append([i, 2])
             # Combination of two voiced obstruents (oD-Ganjati) or a voiced and a voiceless obstruent grapheme (oD-Kleniti)
-            elif current_consonant_grapheme in voiced_obstruent_graphemes:
-                if next_consonant_grapheme in voiced_obstruent_graphemes:
+            elif current_class == VOICED_OBSTRUENT:
+                if next_class == VOICED_OBSTRUENT:
                     split_options.append([i, 1])
-                elif next_consonant_grapheme in voiceless_obstruent_graphemes:
+                elif next_class == VOICELESS_OBSTRUENT:
                     split_options.append([i, 3])
                 # TODO - ADD VOICED OBSTRUENT + SONORANT
-                elif next_consonant_grapheme in sonorant_graphemes:
+                elif next_class == SONORANT:
                     split_options.append([i, 2])
             # Combination of a voiceless and a voiced obstruent grapheme (glas-Ba)
-            elif current_consonant_grapheme in voiceless_obstruent_graphemes:
-                if next_consonant_grapheme in voiced_obstruent_graphemes:
+            elif current_class == VOICELESS_OBSTRUENT:
+                if next_class == VOICED_OBSTRUENT:
                     split_options.append([i, 4])
                 # TODO - Add TWO VOICELESS OBSTRUENTS? (poS-Tulat)
-                elif next_consonant_grapheme in voiceless_obstruent_graphemes:
+                elif next_class == VOICELESS_OBSTRUENT:
                     split_options.append([i, 2])
                 # TODO - Add VOICELESS OBSTRUENT + SONORANT
-                #elif next_consonant_grapheme in sonorant_graphemes:
+                #elif next_class == SONORANT:
                 #    split_options.append([i, 2])
 
         if split_options == []:
@@ -113,8 +134,8 @@ def split_consonant_graphemes_between_syllables(consonants):
             return consonants[:split[0] + 1], consonants[split[0] + 1:]
 
 
-def create_syllables(word, vowels):
-    """A function that splits a word into syllables."""
+def _split_syllables(word, vowels):
+    """Splits a word into syllables; returns the word itself if it has no vowels."""
     list_of_characters_in_word = list(word)
     consonants = []
     syllables = []
@@ -135,4 +156,53 @@ def create_syllables(word, vowels):
         return word
     syllables[-1] += ''.join(consonants)
 
-    return syllables
\ No newline at end of file
+    return syllables
+
+
+@lru_cache(maxsize=SYLLABIZE_CACHE_SIZE)
+def _default_syllables(word):
+    """Cached _split_syllables with the default vowel graphemes, as a tuple (or the word if it has no vowels)."""
+    syllables = _split_syllables(word, VOWEL_GRAPHEMES)
+    if isinstance(syllables, str):
+        return syllables
+    return tuple(syllables)
+
+
+def create_syllables(word, vowels):
+    """
+    A function that splits a word into syllables.
+    With the default vowel graphemes the result is taken from the syllabification cache.
+    """
+    if vowels == VOWEL_GRAPHEMES:
+        syllables = _default_syllables(word)
+        return syllables if isinstance(syllables, str) else list(syllables)
+    return _split_syllables(word, vowels)
+
+
+def syllabize_word(word):
+    """
+    Cached variant of create_syllables using the default vowel graphemes.
+    Always returns a tuple of syllables; a word without vowels is returned as a single syllable.
+    """
+    syllables = _default_syllables(word)
+    if isinstance(syllables, str):
+        return (syllables,)
+    return syllables
+
+
+def syllabize_vocabulary(words):
+    """
+    Syllabify a vocabulary in one pass.
+
+    Parameters:
+    - words: Iterable of words; repeated tokens are syllabified only once.
+
+    Returns:
+    - Dictionary mapping each distinct word to a tuple of its syllables.
+    """
+    return {word: syllabize_word(word) for word in dict.fromkeys(words)}
+
+
+def syllabize_cache_info():
+    """Returns hit/miss statistics of the syllabification cache."""
+    return _default_syllables.cache_info()
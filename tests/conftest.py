@@ -0,0 +1,16 @@
+import importlib.util
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+def load_script(filename):
+    """Import a script from the repository root, also those whose names are not valid module names."""
+    name = os.path.splitext(filename)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
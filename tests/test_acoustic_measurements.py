@@ -0,0 +1,102 @@
+import csv
+
+import numpy as np
+import pytest
+
+parselmouth = pytest.importorskip("parselmouth")
+textgrid = pytest.importorskip("textgrid")
+
+import acoustic_measurements
+from utils_acoustic import tier_frame_indices
+
+SAMPLING_FREQUENCY = 16000
+DURATION = 2.0
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    """A tone gliding up to 550 Hz (above the 500 Hz ceiling of the average pitch) with voiceless gaps."""
+    directory = tmp_path_factory.mktemp("acoustics")
+    t = np.arange(int(DURATION * SAMPLING_FREQUENCY)) / SAMPLING_FREQUENCY
+    frequency = 120 + 430 * t / DURATION
+    signal = 0.3 * np.sin(2 * np.pi * np.cumsum(frequency) / SAMPLING_FREQUENCY)
+    for gap_start in (0.3, 0.9, 1.5):
+        signal[(t > gap_start) & (t < gap_start + 0.08)] = 0
+    wav_path = directory / "input.wav"
+    parselmouth.Sound(signal, SAMPLING_FREQUENCY).save(str(wav_path), "WAV")
+
+    tier = textgrid.IntervalTier(name="phones", minTime=0, maxTime=DURATION)
+    boundaries = np.linspace(0, DURATION, 41)
+    for i, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        tier.addInterval(textgrid.Interval(start, end, f"p{i}"))
+    tg = textgrid.TextGrid(minTime=0, maxTime=DURATION)
+    tg.append(tier)
+    textgrid_path = directory / "input.TextGrid"
+    tg.write(str(textgrid_path))
+    # Read the tier back, so that its boundaries are those main() sees
+    return str(wav_path), str(textgrid_path), textgrid.TextGrid.fromFile(str(textgrid_path)).getFirst("phones")
+
+
+def reference_trends(pitch, tier):
+    pitch_values = pitch.selected_array['frequency']
+    trends = []
+    for start, end in zip(*tier_frame_indices(pitch, tier)):
+        segment = pitch_values[start:end]
+        if all(x < y for x, y in zip(segment, segment[1:])):
+            trends.append('rising')
+        elif all(x > y for x, y in zip(segment, segment[1:])):
+            trends.append('falling')
+        else:
+            trends.append('mixed' if len(segment) > 1 else 'unknown')
+    return trends
+
+
+def reference_vot(pitch, tier, cutoff_frequency=100):
+    pitch_values = pitch.selected_array['frequency']
+    vot_values = []
+    for interval, start, end in zip(tier, *tier_frame_indices(pitch, tier)):
+        for i, pitch_value in enumerate(pitch_values[start:end]):
+            if pitch_value > cutoff_frequency:
+                vot = interval.maxTime - (pitch.x1 + (start + i) * pitch.dx)
+                break
+        else:
+            vot = 0.0
+        vot_values.append(round(vot, 3))
+    return vot_values
+
+
+def test_trend_and_vot_use_the_default_pitch_analysis(recording):
+    wav_path, _, tier = recording
+    pitch = parselmouth.Sound(wav_path).to_pitch()
+    assert acoustic_measurements.compute_pitch_trend(wav_path, tier) == reference_trends(pitch, tier)
+    assert acoustic_measurements.compute_vot(wav_path, tier) == reference_vot(pitch, tier)
+
+
+def test_main_keeps_each_measurement_on_its_own_pitch_track(recording, tmp_path):
+    wav_path, textgrid_path, tier = recording
+    output_csv = tmp_path / "output.csv"
+
+    acoustic_measurements.main(textgrid_path, wav_path, str(output_csv), "phones",
+                               ["pitch", "pitch_trend", "vot"])
+
+    with open(output_csv, encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    pitch = parselmouth.Sound(wav_path).to_pitch()
+    assert [row["AvgPitch"] for row in rows] == [str(v) for v in acoustic_measurements.compute_pitch(wav_path, tier)]
+    assert [row["PitchTrend"] for row in rows] == reference_trends(pitch, tier)
+    assert [row["VOT"] for row in rows] == [str(v) for v in reference_vot(pitch, tier)]
+
+
+def test_main_loads_the_sound_once(recording, tmp_path, monkeypatch):
+    wav_path, textgrid_path, tier = recording
+    loads = []
+    sound_class = parselmouth.Sound
+
+    def load(*args, **kwargs):
+        loads.append(args)
+        return sound_class(*args, **kwargs)
+
+    monkeypatch.setattr(acoustic_measurements.parselmouth, "Sound", load)
+    acoustic_measurements.main(textgrid_path, wav_path, str(tmp_path / "output.csv"), "phones",
+                               ["pitch", "pitch_trend", "formants", "intensity", "vot", "cog"])
+    assert len(loads) == 1
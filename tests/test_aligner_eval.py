@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("textgrid")
+
+from aligner_eval import compute_averages, evaluate_file, open_result_store, save_result, stored_results
+
+WORDS = ["ja", "to", "je", "pa", "ne", "dobro"]
+
+
+def write_ctm(path, words):
+    with open(path, "w") as file:
+        for start, word in words:
+            file.write(f"a 1 {start:.3f} 0.200 {word}\n")
+
+
+@pytest.fixture
+def ctm_dirs(tmp_path):
+    fa_dir, gt_dir = tmp_path / "fa", tmp_path / "gt"
+    fa_dir.mkdir()
+    gt_dir.mkdir()
+    write_ctm(gt_dir / "rec.ctm", [(0.5 * i, word) for i, word in enumerate(WORDS)])
+    return fa_dir, gt_dir
+
+
+def evaluate(fa_dir, gt_dir, align):
+    return evaluate_file("rec", [str(fa_dir), str(gt_dir)], [".ctm", ".ctm"], align=align)
+
+
+def test_extra_fa_word_is_skipped_without_align(ctm_dirs):
+    fa_dir, gt_dir = ctm_dirs
+    fa_words = [(0.5 * i + 0.01, word) for i, word in enumerate(WORDS)]
+    write_ctm(fa_dir / "rec.ctm", fa_words[:3] + [(1.6, "eee")] + fa_words[3:])
+
+    lines, differences, coverage = evaluate(fa_dir, gt_dir, align=False)
+    assert differences is None
+    assert "number of GT words is different than FA words" in lines[-1]
+
+
+def test_extra_fa_word_is_aligned(ctm_dirs):
+    fa_dir, gt_dir = ctm_dirs
+    fa_words = [(0.5 * i + 0.01, word) for i, word in enumerate(WORDS)]
+    write_ctm(fa_dir / "rec.ctm", fa_words[:3] + [(1.6, "eee")] + fa_words[3:])
+
+    lines, differences, coverage = evaluate(fa_dir, gt_dir, align=True)
+    assert coverage == (6, 6)
+    assert differences == pytest.approx([10] * 6)
+
+
+def test_missing_fa_word_is_aligned(ctm_dirs):
+    fa_dir, gt_dir = ctm_dirs
+    fa_words = [(0.5 * i + 0.02, word) for i, word in enumerate(WORDS)]
+    write_ctm(fa_dir / "rec.ctm", fa_words[:2] + fa_words[3:])
+
+    lines, differences, coverage = evaluate(fa_dir, gt_dir, align=True)
+    assert coverage == (5, 6)
+    assert differences == pytest.approx([20] * 5)
+    assert "coverage = 83.3% (5/6 words)" in lines[-1]
+
+
+def test_trimmed_center_discards_outliers_like_a_trimmed_mean():
+    # Four references of three words; the last reference starts the first word almost 4 s late
+    references = [
+        [(0.0, 0.4, "ja"), (0.5, 0.9, "to"), (None, None, "je")],
+        [(0.1, 0.4, "ja"), (0.6, 0.9, "to"), (1.0, 1.3, "je")],
+        [(0.2, 0.4, "ja"), (0.5, 1.0, "to"), (None, None, "je")],
+        [(3.9, 0.4, "ja"), (0.6, 1.0, "to"), (1.2, 1.4, "je")],
+    ]
+    # The late start pulls the mean center (1.05) so far that the earliest start is dropped
+    # too; the trimmed center (0.15) keeps all the other starts
+    assert compute_averages(references, "mean")[0][0] == pytest.approx(0.15)
+    averages = compute_averages(references, "trimmed")
+    assert averages[0][0] == pytest.approx(0.1)
+    assert averages[1][0] == pytest.approx(0.55)
+    # With two values nothing is trimmed
+    assert averages[2] == (pytest.approx(1.1), pytest.approx(1.35), "je")
+
+
+def test_report_with_keys_covers_current_files_only():
+    store = open_result_store(":memory:")
+    for base_name in ("a", "b", "c"):
+        save_result(store, base_name, f"{base_name}-key", ([], [0.01, 0.02], (2, 2)))
+
+    assert len(stored_results(store)) == 3
+    # "b" is no longer an input and "c" changed since it was stored
+    assert len(stored_results(store, keys={"a": "a-key", "c": "c-new-key"})) == 1
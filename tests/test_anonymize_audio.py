@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+pydub = pytest.importorskip("pydub")
+textgrid = pytest.importorskip("textgrid")
+
+import anonymize_audio
+
+FRAME_RATE = 16000
+
+
+def write_wav(path, seconds=2.0, channels=1):
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 3000, (int(seconds * FRAME_RATE), channels)).astype(np.int16)
+    audio = pydub.AudioSegment(samples.tobytes(), frame_rate=FRAME_RATE, sample_width=2, channels=channels)
+    audio.export(str(path), format="wav")
+    return samples
+
+
+def write_textgrid(path, words, duration=2.0):
+    tg = textgrid.TextGrid(minTime=0, maxTime=duration)
+    tier = textgrid.IntervalTier(name="strd-wrd-sgmnt", minTime=0, maxTime=duration)
+    step = duration / len(words)
+    for i, word in enumerate(words):
+        tier.addInterval(textgrid.Interval(i * step, (i + 1) * step, word))
+    tg.append(tier)
+    tg.write(str(path))
+
+
+def test_directory_without_names_runs_ner_once(tmp_path, monkeypatch):
+    wav_dir, tg_dir, out_dir = tmp_path / "wav", tmp_path / "tg", tmp_path / "out"
+    wav_dir.mkdir()
+    tg_dir.mkdir()
+    for name in ("a", "b"):
+        write_wav(wav_dir / f"{name}.wav")
+        write_textgrid(tg_dir / f"{name}.TextGrid", ["dober", "dan", "vsem"])
+
+    batches = []
+
+    def fake_batch(texts, cache=None, batch_size=8):
+        batches.append(texts)
+        return [[] for _ in texts]
+
+    def fail_single(text, cache=None):
+        raise AssertionError("NER must not run again for a single file")
+
+    monkeypatch.setattr(anonymize_audio, "identify_names_batch", fake_batch)
+    monkeypatch.setattr(anonymize_audio, "identify_names", fail_single)
+
+    anonymize_audio.anonymize_directory_textgrid(str(wav_dir), str(tg_dir), str(out_dir))
+    assert len(batches) == 1
+    assert sorted(p.name for p in out_dir.iterdir()) == ["a.wav", "b.wav"]
+
+
+def test_empty_keywords_anonymize_nothing(tmp_path):
+    samples = write_wav(tmp_path / "in.wav")
+    write_textgrid(tmp_path / "in.TextGrid", ["dober", "dan", "vsem"])
+    hits = anonymize_audio.anonymize_audio_textgrid(str(tmp_path / "in.wav"), str(tmp_path / "in.TextGrid"),
+                                                    str(tmp_path / "out.wav"), keywords=[])
+    assert hits == []
+    out = pydub.AudioSegment.from_wav(str(tmp_path / "out.wav"))
+    assert np.array_equal(np.array(out.get_array_of_samples()), samples[:, 0])
+
+
+def test_render_beeps_only_touches_intervals():
+    rng = np.random.default_rng(1)
+    samples = rng.normal(0, 3000, (FRAME_RATE * 3, 2)).astype(np.int16)
+    audio = pydub.AudioSegment(samples.tobytes(), frame_rate=FRAME_RATE, sample_width=2, channels=2)
+    intervals_ms = [(500, 800), (700, 1200), (2000, 2100)]
+
+    out = anonymize_audio.render_beeps(audio, intervals_ms, replace=True)
+    result = np.array(out.get_array_of_samples()).reshape(-1, 2)
+
+    covered = np.zeros(len(samples), dtype=bool)
+    for start_ms, end_ms in intervals_ms:
+        covered[start_ms * FRAME_RATE // 1000:end_ms * FRAME_RATE // 1000] = True
+    assert np.array_equal(result[~covered], samples[~covered])
+    # Replaced spans hold the same tone on every channel, quieter than the audio around it
+    assert np.array_equal(result[covered, 0], result[covered, 1])
+    beep_rms = np.sqrt(np.mean(result[covered].astype(np.float64) ** 2))
+    assert 0.5 * 3000 < beep_rms < 0.8 * 3000
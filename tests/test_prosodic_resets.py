@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+parselmouth = pytest.importorskip("parselmouth")
+textgrid = pytest.importorskip("textgrid")
+
+import prosodic_resets
+from conftest import load_script
+
+SAMPLING_FREQUENCY = 16000
+DURATION = 4.0
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    """A gliding tone with stepwise loudness changes and a syllable tier of uneven syllables."""
+    directory = tmp_path_factory.mktemp("prosody")
+    t = np.arange(int(DURATION * SAMPLING_FREQUENCY)) / SAMPLING_FREQUENCY
+    frequency = 150 + 60 * np.sin(2 * np.pi * 0.7 * t) + 40 * (np.floor(t * 3) % 2)
+    phase = 2 * np.pi * np.cumsum(frequency) / SAMPLING_FREQUENCY
+    loudness = 0.05 * 10 ** (np.floor(t * 5) % 3 / 2)
+    signal = loudness * np.sin(phase)
+    signal[(t > 2.2) & (t < 2.5)] = 0  # a pause without pitch and with silent intensity frames
+    wav_path = directory / "input.wav"
+    parselmouth.Sound(signal, SAMPLING_FREQUENCY).save(str(wav_path), "WAV")
+
+    boundaries = np.cumsum(np.resize([0.12, 0.2, 0.09, 0.35, 0.15, 0.1, 0.25], 30))
+    boundaries = np.concatenate(([0.0], boundaries[boundaries < DURATION - 0.05], [DURATION]))
+    tg = textgrid.TextGrid(minTime=0, maxTime=DURATION)
+    tier = textgrid.IntervalTier(name="cnvrstl-syllables", minTime=0, maxTime=DURATION)
+    for i, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        tier.addInterval(textgrid.Interval(start, end, "" if i % 9 == 4 else f"s{i}"))
+    tg.append(tier)
+    textgrid_path = directory / "input.TextGrid"
+    tg.write(str(textgrid_path))
+    return directory, str(wav_path), str(textgrid_path)
+
+
+def tier_labels(path, name):
+    return [(interval.minTime, interval.maxTime, interval.mark)
+            for interval in textgrid.TextGrid.fromFile(path).getFirst(name)]
+
+
+@pytest.mark.parametrize("pitch_method", ["average-neighboring", "intrasyllabic"])
+@pytest.mark.parametrize("method", ["near", "extended"])
+def test_matches_single_tier_scripts(recording, method, pitch_method):
+    directory, wav_path, textgrid_path = recording
+    window = prosodic_resets.WINDOWS[method]
+    threshold = 3
+
+    combined = str(directory / f"combined-{method}-{pitch_method}.TextGrid")
+    prosodic_resets.main(wav_path, textgrid_path, combined, pitch_reset_threshold=20,
+                         intensity_reset_threshold=threshold, pitch_method=pitch_method,
+                         intensity_window=window, rate_window=window)
+
+    expected = {}
+    single = str(directory / f"pitch-{method}-{pitch_method}.TextGrid")
+    load_script("add_pitch-reset_tier.py").detect_pitch_resets(wav_path, textgrid_path, single, 20, pitch_method)
+    expected["pitch-reset"] = tier_labels(single, "pitch-reset")
+    single = str(directory / f"intensity-{method}.TextGrid")
+    load_script("add_intensity-reset_tier.py").detect_intensity_resets(wav_path, textgrid_path, single, threshold, method)
+    expected["intensity-reset"] = tier_labels(single, "intensity-reset")
+    single = str(directory / f"rate-{method}.TextGrid")
+    load_script("add_speech-rate-reduction_tier.py").detect_speech_rate_reduction(
+        wav_path, textgrid_path, single, prosodic_resets.REDUCTION_THRESHOLD, method)
+    expected["speech-rate-reduction"] = tier_labels(single, "speech-rate-reduction")
+
+    for name, intervals in expected.items():
+        labels = [label for _, _, label in intervals]
+        assert {"POS", "NEG"} <= set(labels), f"{name} does not exercise both labels"
+        assert tier_labels(combined, name) == intervals, name
+
+
+def test_default_intensity_threshold_matches_single_tier_script():
+    import inspect
+
+    script = load_script("add_intensity-reset_tier.py")
+    script_default = inspect.signature(script.detect_intensity_resets).parameters["intensity_reset_threshold"].default
+    for function in (prosodic_resets.detect_prosodic_resets, prosodic_resets.main):
+        default = inspect.signature(function).parameters["intensity_reset_threshold"].default
+        assert default == script_default == prosodic_resets.INTENSITY_RESET_THRESHOLD
@@ -0,0 +1,23 @@
+import slovene_syllable_splitter as splitter
+
+
+def test_create_syllables_uses_the_cache():
+    vowels = splitter.get_vowel_graphemes()
+    splitter.create_syllables("objemka", vowels)
+    hits = splitter.syllabize_cache_info().hits
+    syllables = splitter.create_syllables("objemka", vowels)
+    assert syllables == ["ob", "jem", "ka"]
+    assert splitter.syllabize_cache_info().hits == hits + 1
+
+    # Callers get their own list, so changing it does not touch the cached entry
+    syllables.append("x")
+    assert splitter.create_syllables("objemka", vowels) == ["ob", "jem", "ka"]
+
+
+def test_create_syllables_return_types():
+    vowels = splitter.get_vowel_graphemes()
+    assert splitter.create_syllables("prst", vowels) == ["prst"]
+    assert splitter.create_syllables("st", vowels) == "st"
+    assert splitter.syllabize_word("st") == ("st",)
+    # Other vowel sets bypass the cache
+    assert splitter.create_syllables("odaja", {"a"}) == ["oda", "ja"]
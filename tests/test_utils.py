@@ -0,0 +1,47 @@
+import random
+
+from utils import _banded_edit_operations, align_sequences
+
+
+def matched_tokens(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, j1, j2 in opcodes if tag == "equal")
+
+
+def test_opcodes_cover_both_sequences():
+    a = "ja ne to je ja pa ne".split()
+    b = "ja to je je ja ne".split()
+    i = j = 0
+    for tag, i1, i2, j1, j2 in align_sequences(a, b):
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+
+
+def test_identical_sequences():
+    words = "ja ne ja ne to".split()
+    assert align_sequences(words, words) == [("equal", 0, 5, 0, 5)]
+
+
+def test_long_insertion_without_anchors():
+    # Only frequent tokens, so there are no unique anchors and the insertion is far outside the base band
+    rng = random.Random(0)
+    a = [rng.choice(["ja", "ne", "to"]) for _ in range(2000)]
+    inserted = [rng.choice(["ja", "ne", "to"]) for _ in range(300)]
+    b = a[:1000] + inserted + a[1000:]
+    assert matched_tokens(align_sequences(a, b)) == len(a)
+    assert matched_tokens(align_sequences(b, a)) == len(a)
+
+
+def test_banded_edit_operations_match_longest_common_subsequence():
+    # With a band covering the whole matrix, every common subsequence is within reach
+    rng = random.Random(1)
+    for _ in range(50):
+        a = [rng.choice("abc") for _ in range(rng.randint(0, 30))]
+        b = [rng.choice("abc") for _ in range(rng.randint(0, 30))]
+        lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+        for i in range(len(a)):
+            for j in range(len(b)):
+                lengths[i + 1][j + 1] = lengths[i][j] + 1 if a[i] == b[j] else max(lengths[i][j + 1], lengths[i + 1][j])
+        assert _banded_edit_operations(a, b, band=30).count("equal") == lengths[-1][-1]
@@ -0,0 +1,109 @@
+import pytest
+
+import utils_textgrid
+
+
+def praat_text(tiers, short=False):
+    """A TextGrid in Praat's long or short text format; tiers are (class, name, items) with items
+    (xmin, xmax, text) for interval tiers and (time, mark) for point tiers."""
+    def quote(text):
+        return '"' + text.replace('"', '""') + '"'
+
+    xmax = 10
+    if short:
+        lines = ['File type = "ooTextFile"', 'Object class = "TextGrid"', "", "0", str(xmax), "<exists>", str(len(tiers))]
+        for tier_class, name, items in tiers:
+            lines += [quote(tier_class), quote(name), "0", str(xmax), str(len(items))]
+            for item in items:
+                lines += [str(value) for value in item[:-1]] + [quote(item[-1])]
+    else:
+        lines = ['File type = "ooTextFile"', 'Object class = "TextGrid"', "", "xmin = 0 ", f"xmax = {xmax} ",
+                 "tiers? <exists> ", f"size = {len(tiers)} ", "item []: "]
+        for i, (tier_class, name, items) in enumerate(tiers, 1):
+            kind = "intervals" if tier_class == "IntervalTier" else "points"
+            lines += [f"    item [{i}]:", f"        class = {quote(tier_class)} ", f"        name = {quote(name)} ",
+                      "        xmin = 0 ", f"        xmax = {xmax} ", f"        {kind}: size = {len(items)} "]
+            for j, item in enumerate(items, 1):
+                lines.append(f"        {kind} [{j}]:")
+                if tier_class == "IntervalTier":
+                    lines += [f"            xmin = {item[0]} ", f"            xmax = {item[1]} ",
+                              f"            text = {quote(item[2])} "]
+                else:
+                    lines += [f"            number = {item[0]} ", f"            mark = {quote(item[1])} "]
+    return "\n".join(lines) + "\n"
+
+
+def intervals(prefix, count):
+    step = 10 / count
+    return [(round(i * step, 4), round((i + 1) * step, 4), f"{prefix}{i}") for i in range(count)]
+
+
+TIERS = [
+    ("IntervalTier", "words", intervals("w", 500)),
+    ("TextTier", "bells", [(1, "a"), (2.5, 'say "b"')]),
+    ("IntervalTier", "phones", intervals("p", 800)),
+]
+
+
+def inventory(tiers):
+    return [{"class": tier_class, "name": name, "xmin": 0.0, "xmax": 10.0, "size": len(items)}
+            for tier_class, name, items in tiers]
+
+
+@pytest.mark.parametrize("short", [False, True])
+def test_scan_tiers(tmp_path, short):
+    path = tmp_path / "grid.TextGrid"
+    path.write_text(praat_text(TIERS, short), encoding="utf-8")
+    assert utils_textgrid.scan_tiers(str(path)) == inventory(TIERS)
+
+
+@pytest.mark.parametrize("short", [False, True])
+def test_labels_with_line_breaks(tmp_path, short):
+    tiers = [("IntervalTier", "words", [(0, 4, "two\nlines"), (4, 10, "x")]),
+             ("TextTier", "bells", [(1, 'a\n"b"\nc')]),
+             ("IntervalTier", "phones", [(0, 5, "p\n"), (5, 10, "q")])]
+    path = tmp_path / "grid.TextGrid"
+    path.write_text(praat_text(tiers, short), encoding="utf-8")
+    assert utils_textgrid.scan_tiers(str(path)) == inventory(tiers)
+    assert list(utils_textgrid.iter_tier_intervals(str(path), "words")) == [(0.0, 4.0, "two\nlines"), (4.0, 10.0, "x")]
+    assert list(utils_textgrid.iter_tier_intervals(str(path), "phones")) == [(0.0, 5.0, "p\n"), (5.0, 10.0, "q")]
+
+
+@pytest.mark.parametrize("short", [False, True])
+def test_scan_never_tokenizes_tier_bodies(tmp_path, monkeypatch, short):
+    path = tmp_path / "grid.TextGrid"
+    path.write_text(praat_text(TIERS, short), encoding="utf-8")
+
+    tokenized = []
+
+    def line_values(line):
+        tokenized.append(line)
+        return original(line)
+
+    original = utils_textgrid._line_values
+    monkeypatch.setattr(utils_textgrid, "_line_values", line_values)
+    utils_textgrid.scan_tiers(str(path))
+    # Only the file header and the five header lines of every tier are tokenized
+    assert len(tokenized) <= 8 + 6 * len(TIERS)
+    assert not any(label in line for line in tokenized for label in ('"w1"', '"a"', '"p1"'))
+
+
+@pytest.mark.parametrize("short", [False, True])
+def test_iter_tier_intervals_skips_earlier_tiers(tmp_path, monkeypatch, short):
+    path = tmp_path / "grid.TextGrid"
+    path.write_text(praat_text(TIERS, short), encoding="utf-8")
+
+    tokenized = []
+
+    def line_values(line):
+        tokenized.append(line)
+        return original(line)
+
+    original = utils_textgrid._line_values
+    monkeypatch.setattr(utils_textgrid, "_line_values", line_values)
+    assert list(utils_textgrid.iter_tier_intervals(str(path), "phones")) == [
+        (float(xmin), float(xmax), text) for xmin, xmax, text in TIERS[2][2]]
+    assert not any(label in line for line in tokenized for label in ('"w1"', '"a"', '"p1"'))
+
+    with pytest.raises(ValueError, match="not found"):
+        list(utils_textgrid.iter_tier_intervals(str(path), "bells"))
@@ -1,6 +1,12 @@
 import re
 import string
-import difflib
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+# Half-width (in tokens) of the band around the diagonal searched by align_sequences
+ALIGNMENT_BAND = 50
 
 def align_transcription_to_words(strd_wrd_sgmnt, transcription):
     """Align transcription words with word intervals from forced alignment.
@@ -8,8 +14,8 @@ def align_transcription_to_words(strd_wrd_sgmnt, transcription):
     The function attempts to match the list of ``words`` derived from the
     transcription with the ``strd_wrd_sgmnt`` intervals returned by the forced
     aligner.  When the number of words and intervals differ the function tries to
-    align them using :class:`difflib.SequenceMatcher` and falls back to
-    heuristics so that each interval receives a label.
+    align them using :func:`align_sequences` and falls back to heuristics so
+    that each interval receives a label (see :func:`label_intervals`).
     """
 
     # Treat words inside the brackets as single word
@@ -25,41 +31,247 @@ def align_transcription_to_words(strd_wrd_sgmnt, transcription):
     # Remove empty or whitespace-only word intervals
     strd_wrd_sgmnt = [interval for interval in strd_wrd_sgmnt if interval[2].strip()]
 
-    fa_words = [interval[2] for interval in strd_wrd_sgmnt]
+    return label_intervals(strd_wrd_sgmnt, words)
+
+def label_intervals(intervals, words, labels=None):
+    """Label word intervals with the words of a transcript aligned to them.
+
+    ``intervals`` are ``(start, end, word)`` tuples from forced alignment and
+    ``words`` the transcript words; the two word sequences are aligned with
+    :func:`align_sequences`.  Each matched (or substituted) interval gets the
+    label of its transcript word (``labels[j]`` for ``words[j]``, the word
+    itself by default).  Labels of unmatched transcript words are appended to
+    the preceding interval and unmatched intervals keep their own word.
+    """
+    if labels is None:
+        labels = words
+    fa_words = [interval[2] for interval in intervals]
 
-    matcher = difflib.SequenceMatcher(None, fa_words, words)
     aligned = []
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    for tag, i1, i2, j1, j2 in align_sequences(fa_words, words):
         if tag in {"equal", "replace"}:
             length = min(i2 - i1, j2 - j1)
             for k in range(length):
-                interval = strd_wrd_sgmnt[i1 + k]
-                word = words[j1 + k]
-                aligned.append((interval[0], interval[1], word))
+                interval = intervals[i1 + k]
+                aligned.append((interval[0], interval[1], labels[j1 + k]))
 
             # Extra words or intervals inside a replace operation
             if (j2 - j1) > length:
-                extra_words = " ".join(words[j1 + length:j2])
+                extra_labels = " ".join(labels[j1 + length:j2])
                 if aligned:
                     s, e, lbl = aligned[-1]
-                    aligned[-1] = (s, e, f"{lbl} {extra_words}")
+                    aligned[-1] = (s, e, f"{lbl} {extra_labels}")
             elif (i2 - i1) > length:
                 for x in range(i1 + length, i2):
-                    interval = strd_wrd_sgmnt[x]
+                    interval = intervals[x]
                     aligned.append((interval[0], interval[1], fa_words[x]))
 
         elif tag == "delete":
             for idx in range(i1, i2):
-                interval = strd_wrd_sgmnt[idx]
+                interval = intervals[idx]
                 aligned.append((interval[0], interval[1], fa_words[idx]))
 
         elif tag == "insert":
-            extra_words = " ".join(words[j1:j2])
+            extra_labels = " ".join(labels[j1:j2])
             if aligned:
                 s, e, lbl = aligned[-1]
-                aligned[-1] = (s, e, f"{lbl} {extra_words}")
+                aligned[-1] = (s, e, f"{lbl} {extra_labels}")
             else:
-                interval = strd_wrd_sgmnt[0]
-                aligned.append((interval[0], interval[1], extra_words))
+                interval = intervals[0]
+                aligned.append((interval[0], interval[1], extra_labels))
 
     return aligned
+
+def assign_intervals_to_words(word_spans, interval_spans):
+    """Assign intervals (e.g. phones) to the word intervals that contain them.
+
+    Both inputs are sequences of ``(start, end)`` pairs sorted by time, as found
+    in a TextGrid interval tier.  An interval belongs to a word when it lies
+    entirely within the word's time span.  Both tiers are swept once with two
+    pointers instead of scanning the whole interval tier for every word.
+
+    Returns a list with, for each word, the list of indices of its intervals.
+    """
+    assigned = []
+    n = len(interval_spans)
+    j = 0
+    for word_start, word_end in word_spans:
+        # Intervals starting before the word cannot be part of it or any later word
+        while j < n and interval_spans[j][0] < word_start:
+            j += 1
+        indices = []
+        k = j
+        while k < n and interval_spans[k][0] <= word_end:
+            if interval_spans[k][1] <= word_end:
+                indices.append(k)
+            k += 1
+        assigned.append(indices)
+    return assigned
+
+def _unique_anchors(a, b):
+    """Pairs ``(i, j)`` of tokens occurring exactly once in both sequences, in increasing order of ``i`` and ``j``.
+
+    Of all such pairs, the longest subsequence that is increasing in both
+    sequences is kept (as in patience diff).
+    """
+    count_a = Counter(a)
+    count_b = Counter(b)
+    position_b = {token: j for j, token in enumerate(b) if count_b[token] == 1}
+    pairs = [(i, position_b[token]) for i, token in enumerate(a) if count_a[token] == 1 and token in position_b]
+
+    # Longest increasing subsequence of the b positions
+    tails, tail_indices, previous = [], [], [None] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_indices.append(k)
+        else:
+            tails[pos] = j
+            tail_indices[pos] = k
+        previous[k] = tail_indices[pos - 1] if pos > 0 else None
+
+    anchors = []
+    k = tail_indices[-1] if tail_indices else None
+    while k is not None:
+        anchors.append(pairs[k])
+        k = previous[k]
+    return anchors[::-1]
+
+def _banded_edit_operations(a, b, band):
+    """Edit operations turning ``a`` into ``b`` with minimal cost, searched within a band around the diagonal.
+
+    Matches cost 0, deletions and insertions 1 and substitutions 2, so the
+    alignment maximizes the number of matched tokens.  Only cells within
+    ``band + abs(len(a) - len(b))`` tokens of the (scaled) diagonal are
+    evaluated, so that a run of insertions or deletions as long as the length
+    difference always fits in the band.  Time and memory are therefore
+    proportional to ``len(a) * (band + abs(len(a) - len(b)))``, which grows
+    quadratically when the sequences differ greatly in length; each row is
+    computed with numpy.  Returns a list of ``"equal"``, ``"replace"``,
+    ``"delete"`` and ``"insert"`` steps.
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return ["delete"] * n + ["insert"] * m
+    band += abs(n - m)
+
+    codes = {}
+    a_codes = np.array([codes.setdefault(token, len(codes)) for token in a])
+    b_codes = np.array([codes.setdefault(token, len(codes)) for token in b])
+
+    # Column range of every row; consecutive rows overlap, so a path from (0, 0) to (n, m) always exists
+    lows = [max(0, i * m // n - band) for i in range(n + 1)]
+    highs = [min(m, -(-(i + 1) * m // n) + band) for i in range(n + 1)]
+
+    # Moves: 0 = diagonal, 1 = up (delete a[i - 1]), 2 = left (insert b[j - 1])
+    previous = np.arange(lows[0], highs[0] + 1)
+    moves = [np.full(highs[0] - lows[0] + 1, 2, dtype=np.uint8)]
+    worst = n + m + 1
+    for i in range(1, n + 1):
+        low, high = lows[i], highs[i]
+        previous_low, previous_high = lows[i - 1], highs[i - 1]
+        columns = np.arange(low, high + 1)
+        best = np.full(high - low + 1, worst)
+        row_moves = np.zeros(high - low + 1, dtype=np.uint8)
+
+        # Diagonal from (i - 1, j - 1)
+        first, last = max(low, previous_low + 1), min(high, previous_high + 1)
+        if first <= last:
+            mismatches = b_codes[first - 1:last] != a_codes[i - 1]
+            best[first - low:last - low + 1] = previous[first - 1 - previous_low:last - previous_low] + 2 * mismatches
+        # Up from (i - 1, j), only when strictly better
+        first, last = max(low, previous_low), min(high, previous_high)
+        if first <= last:
+            up = previous[first - previous_low:last - previous_low + 1] + 1
+            cells = best[first - low:last - low + 1]
+            better = up < cells
+            cells[better] = up[better]
+            row_moves[first - low:last - low + 1][better] = 1
+        # Left from (i, j - 1): the cost of j is the minimum of best[k] + (j - k) over k <= j
+        current = np.minimum.accumulate(best - columns) + columns
+        row_moves[current < best] = 2
+        previous = current
+        moves.append(row_moves)
+
+    operations = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        move = moves[i][j - lows[i]] if i > 0 else 2
+        if move == 0:
+            operations.append("equal" if a[i - 1] == b[j - 1] else "replace")
+            i, j = i - 1, j - 1
+        elif move == 1:
+            operations.append("delete")
+            i -= 1
+        else:
+            operations.append("insert")
+            j -= 1
+    return operations[::-1]
+
+def align_sequences(a, b, band=ALIGNMENT_BAND):
+    """Align two token sequences and return difflib-style opcodes.
+
+    The result has the format of :meth:`difflib.SequenceMatcher.get_opcodes`:
+    a list of ``(tag, i1, i2, j1, j2)`` tuples covering both sequences.  Unlike
+    :class:`difflib.SequenceMatcher` it has no junk heuristic, so frequent tokens
+    are aligned like any other.  Tokens that occur once in both sequences serve
+    as anchors, and the stretches between anchors are aligned by a banded edit
+    distance.  Each stretch costs time and memory proportional to its length
+    times ``band`` plus the length difference of its two sides: transcripts
+    with many unique words align in close to linear time, but a long stretch
+    without anchors whose sides differ greatly in length approaches quadratic
+    cost.
+    """
+    operations = []
+    i, j = 0, 0
+    for anchor_i, anchor_j in _unique_anchors(a, b) + [(len(a), len(b))]:
+        operations += _banded_edit_operations(a[i:anchor_i], b[j:anchor_j], band)
+        if anchor_i < len(a):
+            operations.append("equal")
+        i, j = anchor_i + 1, anchor_j + 1
+
+    # Group the steps into opcodes; adjacent differing steps form a single replace, delete or insert
+    opcodes = []
+    i, j = 0, 0
+    k = 0
+    while k < len(operations):
+        i1, j1 = i, j
+        if operations[k] == "equal":
+            while k < len(operations) and operations[k] == "equal":
+                i, j, k = i + 1, j + 1, k + 1
+            opcodes.append(("equal", i1, i, j1, j))
+            continue
+        while k < len(operations) and operations[k] != "equal":
+            if operations[k] != "insert":
+                i += 1
+            if operations[k] != "delete":
+                j += 1
+            k += 1
+        tag = "replace" if i > i1 and j > j1 else ("delete" if i > i1 else "insert")
+        opcodes.append((tag, i1, i, j1, j))
+    return opcodes
+
+def windows_containing_points(windows, points):
+    """Check which time windows contain at least one of the given time points.
+
+    ``windows`` is a sequence of ``(low, high)`` pairs and ``points`` a
+    sequence of times, e.g. the boundaries of a tier.  A window contains a
+    point when ``low <= point <= high``.  Points and windows are sorted once
+    and swept with two pointers, instead of testing every window against
+    every point.
+
+    Returns a list of booleans, one for each window in the input order.
+    """
+    points = sorted(points)
+    order = sorted(range(len(windows)), key=lambda k: windows[k][0])
+    contained = [False] * len(windows)
+    n = len(points)
+    p = 0
+    for k in order:
+        low, high = windows[k]
+        # Points before this window are also before all later windows
+        while p < n and points[p] < low:
+            p += 1
+        contained[k] = p < n and points[p] <= high
+    return contained
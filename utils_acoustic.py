@@ -0,0 +1,93 @@
+import numpy as np
+
+
+def frame_indices(starts, ends, x1, dx, n_frames):
+    """Map time intervals to frame index ranges of a regularly sampled track.
+
+    Frame ``i`` of a Praat track (Pitch, Intensity, ...) is centred at
+    ``x1 + i * dx``.  For every interval the function returns the half-open
+    range ``[start, end)`` of frames whose centres lie within
+    ``[start_time, end_time]``, so ``values[start:end]`` selects the frames of
+    the interval.  All intervals are mapped at once with :func:`np.searchsorted`.
+    """
+    frame_times = x1 + np.arange(n_frames) * dx
+    start_idx = np.searchsorted(frame_times, np.asarray(starts, dtype=float), side="left")
+    end_idx = np.searchsorted(frame_times, np.asarray(ends, dtype=float), side="right")
+    return start_idx, np.maximum(end_idx, start_idx)
+
+
+def track_frame_indices(track, starts, ends):
+    """Map time intervals to frame index ranges of a parselmouth track using its ``x1``/``dx``."""
+    return frame_indices(starts, ends, track.x1, track.dx, track.nx)
+
+
+def tier_frame_indices(track, tier):
+    """Map all intervals of a TextGrid tier to frame index ranges of ``track``."""
+    starts = [interval.minTime for interval in tier]
+    ends = [interval.maxTime for interval in tier]
+    return track_frame_indices(track, starts, ends)
+
+
+def masked_interval_means(values, start_idx, end_idx, mask):
+    """
+    Mean of ``values[start:end][mask[start:end]]`` for every interval, using cumulative sums.
+
+    Returns a tuple (means, counts); intervals without selected frames get a mean of 0.
+    """
+    n = len(values)
+    start_idx = np.clip(start_idx, 0, n)
+    end_idx = np.clip(np.maximum(end_idx, start_idx), 0, n)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(mask, values, 0.0))))
+    frame_counts = np.concatenate(([0], np.cumsum(mask)))
+    counts = frame_counts[end_idx] - frame_counts[start_idx]
+    totals = sums[end_idx] - sums[start_idx]
+    means = np.divide(totals, counts, out=np.zeros(len(counts)), where=counts > 0)
+    return means, counts
+
+
+def masked_interval_extrema(values, start_idx, end_idx, mask):
+    """
+    Minimum and maximum of the selected frames of every interval.
+
+    Intervals without selected frames get NaN.
+    """
+    n = len(values)
+    if len(start_idx) == 0:
+        return np.zeros(0), np.zeros(0)
+    start_idx = np.clip(start_idx, 0, n)
+    end_idx = np.clip(np.maximum(end_idx, start_idx), 0, n)
+    # NaN marks unselected frames and doubles as a sentinel so that index n is valid for reduceat
+    selected = np.append(np.where(mask, values, np.nan), np.nan)
+    bounds = np.column_stack((start_idx, end_idx)).ravel()
+    with np.errstate(invalid="ignore"):
+        minima = np.fmin.reduceat(selected, bounds)[::2]
+        maxima = np.fmax.reduceat(selected, bounds)[::2]
+    empty = start_idx == end_idx
+    minima[empty] = np.nan
+    maxima[empty] = np.nan
+    return minima, maxima
+
+
+def syllable_pitch_statistics(pitch_values, start_idx, end_idx):
+    """
+    Per-syllable pitch statistics computed once from the voiced (non-zero) frames.
+
+    Returns a dictionary of arrays with one entry per syllable:
+    - mean: mean pitch in Hz (0 when unvoiced)
+    - min, max: pitch extremes in Hz (NaN when unvoiced)
+    - voiced_count: number of voiced frames
+    - semitone_range: 12 * log2(max / min) (NaN when unvoiced)
+    """
+    pitch_values = np.asarray(pitch_values, dtype=float)
+    voiced = pitch_values != 0
+    means, voiced_counts = masked_interval_means(pitch_values, start_idx, end_idx, voiced)
+    minima, maxima = masked_interval_extrema(pitch_values, start_idx, end_idx, voiced)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        semitone_range = 12 * np.log2(maxima / minima)
+    return {
+        "mean": means,
+        "min": minima,
+        "max": maxima,
+        "voiced_count": voiced_counts,
+        "semitone_range": semitone_range,
+    }
@@ -0,0 +1,296 @@
+import codecs
+import io
+import re
+from collections import deque
+from itertools import chain, islice
+
+# Quoted strings (with "" as an escaped quote) or runs of other non-space characters
+TOKEN_PATTERN = re.compile(r'"((?:[^"]|"")*)"|([^\s"]+)')
+
+# Number of bytes inspected to detect the encoding of a file without a BOM
+ENCODING_SAMPLE_SIZE = 65536
+
+TIER_CLASSES = ("IntervalTier", "TextTier")
+
+# One interval of an interval tier in the long and in the short text format
+LONG_INTERVAL_PATTERN = re.compile(r'\s*intervals \[\d+\]:\s*xmin = (\S+)\s*xmax = (\S+)\s*text = "((?:[^"]|"")*)"')
+SHORT_INTERVAL_PATTERN = re.compile(r'\s*(\S+)\s+(\S+)\s+"((?:[^"]|"")*)"')
+
+
+def detect_encoding(sample):
+    """Detect the encoding of a TextGrid file from its first bytes.
+
+    A byte order mark decides between UTF-8 and UTF-16.  Without one, NUL
+    bytes in the first character indicate UTF-16 written without a BOM, and
+    otherwise the sample is checked to be valid UTF-8, falling back to Latin-1.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if sample[:2].startswith(b"\x00"):
+        return "utf-16-be"
+    if sample[1:2] == b"\x00":
+        return "utf-16-le"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def open_textgrid(path):
+    """Open a text TextGrid file for reading, with the encoding detected from its first bytes."""
+    raw = open(path, "rb", buffering=ENCODING_SAMPLE_SIZE)
+    encoding = detect_encoding(raw.peek(ENCODING_SAMPLE_SIZE)[:ENCODING_SAMPLE_SIZE])
+    return io.TextIOWrapper(raw, encoding=encoding)
+
+
+def textgrid_values(stream):
+    """Yield the values of a TextGrid file in text format, in file order.
+
+    Quoted strings are yielded unescaped, numbers and flags (``<exists>``) as
+    they are written.  Labels such as ``xmin =`` or ``intervals [1]:`` are
+    skipped, so the long and the short text format give the same values.
+    """
+    pending = ""
+    for line in stream:
+        # A string with a line break continues on the next line(s)
+        if pending:
+            line = pending + line
+        if line.count('"') % 2:
+            pending = line
+            continue
+        pending = ""
+        yield from _line_values(line)
+
+
+def _line_values(line):
+    """Values of a line that does not end inside a string."""
+    values = []
+    for match in TOKEN_PATTERN.finditer(line):
+        string, token = match.groups()
+        if token is None:
+            values.append(string.replace('""', '"'))
+        elif token[0] in "0123456789-+.<":
+            values.append(token)
+    return values
+
+
+def _read_file_header(values, path):
+    """Read the header of a TextGrid and return the number of tiers."""
+    file_type, object_class = next(values, None), next(values, None)
+    if file_type not in ("ooTextFile", "ooTextFile short") or object_class != "TextGrid":
+        raise ValueError(f"{path} is not a TextGrid file in text format")
+    next(values)  # xmin
+    next(values)  # xmax
+    if next(values) != "<exists>":
+        return 0
+    return int(next(values))
+
+
+def _read_tier_header(values):
+    return {
+        "class": next(values),
+        "name": next(values),
+        "xmin": float(next(values)),
+        "xmax": float(next(values)),
+        "size": int(next(values)),
+    }
+
+
+def _tier_item_length(tier):
+    """Number of values of an interval (xmin, xmax, text) or a point (time, mark)."""
+    return 3 if tier["class"] == "IntervalTier" else 2
+
+
+def _read_header_lines(stream, count):
+    """Read ``count`` values written one per line, as Praat writes headers.
+
+    Returns the values and the line holding the first of them, or None if a
+    line holds several values or a string that continues on the next line.
+    """
+    values, first_line = [], None
+    while len(values) < count:
+        line = stream.readline()
+        if not line or line.count('"') % 2:
+            return None
+        line_values = _line_values(line)
+        if len(line_values) > 1:
+            return None
+        if line_values and first_line is None:
+            first_line = line
+        values.extend(line_values)
+    return values, first_line
+
+
+def _skip_lines(stream, count):
+    deque(islice(stream, count), maxlen=0)
+
+
+def _find_tiers_by_lines(stream, tier_name=None):
+    """Read the tier headers of a TextGrid written by Praat, skipping each tier body by its line count.
+
+    In the long text format an interval takes 4 lines and a point 3, in the
+    short format 3 and 2, so the bodies are skipped without tokenizing them.
+    With ``tier_name`` the search stops after the header of the first interval
+    tier with that name, leaving the stream at the start of its body.
+
+    Returns the tier headers read, or None if the file is not laid out one
+    value per line or a body did not end where its line count says (a label
+    with a line break); the file must then be read value by value.
+    """
+    header = _read_header_lines(stream, 5)
+    if header is None or header[0][0] not in ("ooTextFile", "ooTextFile short") or header[0][1] != "TextGrid":
+        return None
+    if header[0][4] != "<exists>":
+        return []
+    size = _read_header_lines(stream, 1)
+    if size is None:
+        return None
+
+    tiers = []
+    for _ in range(int(size[0][0])):
+        tier_header = _read_header_lines(stream, 5)
+        if tier_header is None or tier_header[0][0] not in TIER_CLASSES:
+            return None
+        values, class_line = tier_header
+        try:
+            tier = _read_tier_header(iter(values))
+        except ValueError:
+            return None
+        tiers.append(tier)
+        if tier_name is not None and tier["class"] == "IntervalTier" and tier["name"] == tier_name:
+            return tiers
+        long_format = class_line.lstrip().startswith("class")
+        _skip_lines(stream, tier["size"] * (_tier_item_length(tier) + long_format))
+
+    # A misplaced skip leaves lines of the last tier behind
+    if stream.read().strip():
+        return None
+    return tiers
+
+
+def _parse_interval_lines(lines, size):
+    """Parse ``size`` intervals from the lines of a tier body, or return None if they do not hold exactly that many."""
+    body = "".join(lines)
+    pattern = LONG_INTERVAL_PATTERN if body.lstrip().startswith("intervals") else SHORT_INTERVAL_PATTERN
+    intervals, position = [], 0
+    for _ in range(size):
+        match = pattern.match(body, position)
+        if match is None:
+            return None
+        xmin, xmax, text = match.groups()
+        intervals.append((float(xmin), float(xmax), text.replace('""', '"')))
+        position = match.end()
+    if body[position:].strip():
+        return None
+    return intervals
+
+
+def iter_tier_intervals(path, tier_name):
+    """Yield the (xmin, xmax, text) intervals of the first interval tier with the given name.
+
+    The file is read once and only up to the end of the requested tier; the
+    bodies of earlier tiers are skipped by their line counts, or value by value
+    when the file is not laid out as Praat writes it.  Raises ValueError if the
+    file has no interval tier with that name.
+    """
+    with open_textgrid(path) as stream:
+        tiers = _find_tiers_by_lines(stream, tier_name)
+        if tiers is not None:
+            if not tiers or tiers[-1]["class"] != "IntervalTier" or tiers[-1]["name"] != tier_name:
+                raise ValueError(f"Tier '{tier_name}' not found in TextGrid file")
+            size = tiers[-1]["size"]
+            lines = []
+            if size:
+                lines.append(stream.readline())
+                lines_per_interval = 4 if lines[0].lstrip().startswith("intervals") else 3
+                lines.extend(islice(stream, size * lines_per_interval - 1))
+            intervals = _parse_interval_lines(lines, size)
+            if intervals is not None:
+                yield from intervals
+                return
+            # A label spans several lines: read the body value by value
+            values = textgrid_values(chain(lines, stream))
+            try:
+                for _ in range(size):
+                    yield float(next(values)), float(next(values)), next(values)
+            except StopIteration:
+                raise ValueError(f"{path} ends before the end of its last tier")
+            return
+    yield from _iter_tier_intervals_by_values(path, tier_name)
+
+
+def _iter_tier_intervals_by_values(path, tier_name):
+    with open_textgrid(path) as stream:
+        values = textgrid_values(stream)
+        try:
+            for _ in range(_read_file_header(values, path)):
+                tier = _read_tier_header(values)
+                if tier["class"] == "IntervalTier" and tier["name"] == tier_name:
+                    for _ in range(tier["size"]):
+                        yield float(next(values)), float(next(values)), next(values)
+                    return
+                for _ in range(tier["size"] * _tier_item_length(tier)):
+                    next(values)
+        except StopIteration:
+            raise ValueError(f"{path} ends before the end of its last tier")
+    raise ValueError(f"Tier '{tier_name}' not found in TextGrid file")
+
+
+def scan_tiers(path):
+    """Return the tier inventory of a TextGrid file.
+
+    Each tier is described by a dictionary with its ``class``, ``name``,
+    ``xmin``, ``xmax`` and ``size`` (number of intervals or points).  Only the
+    tier headers are parsed; the tier bodies are skipped by their line counts,
+    or value by value when the file is not laid out as Praat writes it.
+    """
+    with open_textgrid(path) as stream:
+        tiers = _find_tiers_by_lines(stream)
+    if tiers is not None:
+        return tiers
+
+    tiers = []
+    with open_textgrid(path) as stream:
+        values = textgrid_values(stream)
+        try:
+            for _ in range(_read_file_header(values, path)):
+                tier = _read_tier_header(values)
+                tiers.append(tier)
+                for _ in range(tier["size"] * _tier_item_length(tier)):
+                    next(values)
+        except StopIteration:
+            raise ValueError(f"{path} ends before the end of its last tier")
+    return tiers
+
+
+def _scan_tiers_or_error(path):
+    try:
+        return scan_tiers(path), None
+    except (OSError, UnicodeError, ValueError) as e:
+        return None, str(e)
+
+
+def scan_tier_inventories(paths, jobs=None):
+    """Scan the tier inventories of many TextGrid files in parallel.
+
+    Yields ``(path, tiers, error)`` in the order of ``paths``, where ``tiers``
+    is the result of :func:`scan_tiers` (None if the file could not be read)
+    and ``error`` the reason it could not be read.  ``jobs`` is the number of
+    worker processes (all CPUs by default, 1 scans in this process).
+    """
+    paths = list(paths)
+    if jobs == 1 or len(paths) < 2:
+        results = map(_scan_tiers_or_error, paths)
+        for path, (tiers, error) in zip(paths, results):
+            yield path, tiers, error
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(_scan_tiers_or_error, paths, chunksize=16)
+        for path, (tiers, error) in zip(paths, results):
+            yield path, tiers, error